@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+"""
+Import-time benchmark of the main program (extract_lecture_free_times.py).
+
+Importing the main module must stay cheap and free of side effects,
+i.e., no heavy dependencies (numpy, mysql.connector, urllib.request, http.client)
+may be imported and no logfiles may be created at import time. This
+script imports the module several times in a fresh interpreter and
+fails (exit code 1) if the best import time exceeds the budget or if
+a heavy dependency has been loaded.
+"""
+
+import subprocess
+import sys
+
+from pathlib import Path
+
+# modules which must not be imported when importing the main program
+heavy_modules = ['numpy', 'mysql', 'mysql.connector', 'urllib.request', 'http.client', 'sqlhandler']
+
+# import-time budget (in milliseconds, best of all runs)
+budget_ms = 50.0
+amount_runs = 5
+
+measure_snippet = (
+	"import sys, time\n"
+	"t_start = time.perf_counter()\n"
+	"import extract_lecture_free_times\n"
+	"t_end = time.perf_counter()\n"
+	"print((t_end - t_start) * 1000.0)\n"
+	"print(','.join(m for m in " + repr(heavy_modules) + " if m in sys.modules))\n"
+)
+
+
+def measure_import_time():
+	"""Import the main program in a fresh interpreter and return the results.
+
+	Returns the import time (in milliseconds) as well as the
+	list of heavy modules that were loaded during the import.
+	"""
+	src_dir = Path(__file__).resolve().parent
+
+	result = subprocess.run(
+		[sys.executable, '-c', measure_snippet],
+		cwd = src_dir, capture_output = True, text = True, check = True)
+
+	time_line, modules_line = result.stdout.splitlines()[-2:]
+	loaded_modules = [m for m in modules_line.split(',') if m]
+
+	return float(time_line), loaded_modules
+
+
+def main():
+	timings = []
+	loaded_modules = set()
+
+	for i in range(amount_runs):
+		import_time, loaded = measure_import_time()
+		timings.append(import_time)
+		loaded_modules.update(loaded)
+
+	best_time = min(timings)
+	print('import time (best of ' + str(amount_runs) + '): ' + '%.2f' % best_time + ' ms (budget: ' + '%.2f' % budget_ms + ' ms)')
+
+	failed = False
+
+	if loaded_modules:
+		print('heavy modules imported at import time: ' + ', '.join(sorted(loaded_modules)))
+		failed = True
+
+	if best_time > budget_ms:
+		print('import time exceeds the budget')
+		failed = True
+
+	return 1 if failed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+
+"""
+Static calendar feeds (iCalendar and JSON) of the lecture-free times.
+
+The lecture-free days (vorlesungsfrei = 1) of the calendar table are
+streamed from the DB (see SqlHandler.fetch_table_batches()), consecutive
+days with the same description are merged into one (multi-day) event and
+the events are written as iCalendar file (.ics, one all-day VEVENT per
+event) and as JSON file. Clients read these (cacheable) files instead of
+querying the DB; the main program only regenerates them when a sync has
+changed rows of the table (see --feed-dir).
+"""
+
+import datetime
+import json
+import os
+import zlib
+
+import events
+
+# filenames of the feeds (within the feed directory)
+feed_ics_filename = 'lecture_free_times.ics'
+feed_json_filename = 'lecture_free_times.json'
+
+# product identifier and domain of the UIDs of the iCalendar feed
+ics_product_id = '-//lecture-free-time-extract//lecture-free times//DE'
+ics_uid_domain = 'lecture-free-time-extract'
+
+
+def feed_paths(feed_dir):
+	"""Return the paths (ics, json) of the feeds in the given directory."""
+	return os.path.join(feed_dir, feed_ics_filename), os.path.join(feed_dir, feed_json_filename)
+
+
+def stream_lecture_free_days(sqlhandlerObj, config, batch_size = 1000):
+	"""Stream the (date, description) rows of the lecture-free days (sorted by date)."""
+	for batch, fetch_seconds in sqlhandlerObj.fetch_table_batches(config.dbDatabase,
+		config.dbCalendarTable, batch_size, 'date, shortinfo', 'vorlesungsfrei = 1', 'date'):
+
+		yield from batch
+
+
+def merge_consecutive_days(day_rows):
+	"""Merge consecutive days with the same description into one event.
+
+	The (date, description) rows must be sorted by date. Yields the
+	events as (first day ordinal, last day ordinal, description).
+	"""
+	current_event = None
+
+	for event_date, event_descr in day_rows:
+		ordinal = events.to_ordinal(event_date)
+
+		if current_event is not None and current_event[2] == event_descr and current_event[1] + 1 == ordinal:
+			current_event[1] = ordinal
+			continue
+
+		if current_event is not None:
+			yield tuple(current_event)
+
+		current_event = [ordinal, ordinal, event_descr]
+
+	if current_event is not None:
+		yield tuple(current_event)
+
+
+def escape_ics_text(text):
+	"""Escape a text value of the iCalendar format (RFC 5545)."""
+	return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+		.replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def fold_ics_line(line):
+	"""Fold a content line into lines of at most 75 octets (RFC 5545), joined by CRLF."""
+	folded_lines = []
+	current_line = ''
+	current_length = 0
+
+	for char in line:
+		char_length = len(char.encode('utf-8'))
+
+		# continuation lines start with a space (which counts towards the 75 octets)
+		if current_length + char_length > 75:
+			folded_lines.append(current_line)
+			current_line = ' '
+			current_length = 1
+
+		current_line += char
+		current_length += char_length
+
+	folded_lines.append(current_line)
+
+	return '\r\n'.join(folded_lines) + '\r\n'
+
+
+def format_ics_event(first_ordinal, last_ordinal, event_descr, dtstamp):
+	"""Return an (all-day) VEVENT of the iCalendar feed."""
+	first_day = datetime.date.fromordinal(first_ordinal)
+	end_day = datetime.date.fromordinal(last_ordinal + 1)	# DTEND is exclusive
+
+	uid = ('lecture-free-' + first_day.strftime('%Y%m%d') + '-' +
+		'%08x' % zlib.crc32(event_descr.encode('utf-8')) + '@' + ics_uid_domain)
+
+	return ''.join(fold_ics_line(line) for line in (
+		'BEGIN:VEVENT',
+		'UID:' + uid,
+		'DTSTAMP:' + dtstamp,
+		'DTSTART;VALUE=DATE:' + first_day.strftime('%Y%m%d'),
+		'DTEND;VALUE=DATE:' + end_day.strftime('%Y%m%d'),
+		'SUMMARY:' + escape_ics_text(event_descr),
+		'CATEGORIES:vorlesungsfrei',
+		'TRANSP:TRANSPARENT',
+		'END:VEVENT'
+	))
+
+
+def write_feeds(merged_events, ics_path, json_path):
+	"""Write the (merged) events as iCalendar and JSON feed.
+
+	The events are written while they are streamed (in one pass)
+	into temporary files, which replace the feeds at the end, i.e.,
+	clients never read a partially written feed. Returns the amount
+	of written events.
+	"""
+	try:
+		amount_events = write_feed_files(merged_events, ics_path + '.tmp', json_path + '.tmp')
+	except BaseException:
+		for tmp_path in (ics_path + '.tmp', json_path + '.tmp'):
+			if os.path.isfile(tmp_path):
+				os.remove(tmp_path)
+		raise
+
+	os.replace(ics_path + '.tmp', ics_path)
+	os.replace(json_path + '.tmp', json_path)
+
+	return amount_events
+
+
+def write_feed_files(merged_events, ics_path, json_path):
+	"""Write the (merged) events into the given iCalendar and JSON files (see write_feeds())."""
+	dtstamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+	amount_events = 0
+
+	with open(ics_path, 'w', encoding = 'utf-8', newline = '') as ics_fp, \
+		open(json_path, 'w', encoding = 'utf-8') as json_fp:
+
+		ics_fp.write(''.join(fold_ics_line(line) for line in (
+			'BEGIN:VCALENDAR',
+			'VERSION:2.0',
+			'PRODID:' + ics_product_id,
+			'CALSCALE:GREGORIAN',
+			'X-WR-CALNAME:vorlesungsfreie Zeiten'
+		)))
+		json_fp.write('[\n')
+
+		for first_ordinal, last_ordinal, event_descr in merged_events:
+			ics_fp.write(format_ics_event(first_ordinal, last_ordinal, event_descr, dtstamp))
+
+			json_fp.write((',\n' if amount_events > 0 else '') + json.dumps({
+				'start': events.to_date_str(first_ordinal),
+				'end': events.to_date_str(last_ordinal),
+				'days': last_ordinal - first_ordinal + 1,
+				'description': event_descr
+			}, ensure_ascii = False))
+
+			amount_events += 1
+
+		ics_fp.write(fold_ics_line('END:VCALENDAR'))
+		json_fp.write('\n]\n')
+
+	return amount_events
+
+
+def generate_feeds(sqlhandlerObj, config, feed_dir, batch_size = 1000):
+	"""Generate the feeds (iCalendar, JSON) of the calendar table in feed_dir.
+
+	The lecture-free days are streamed from the DB and merged into
+	multi-day events on the fly, i.e., the table is never held in
+	memory. Returns the amount of written events.
+	"""
+	os.makedirs(feed_dir, exist_ok = True)
+	ics_path, json_path = feed_paths(feed_dir)
+
+	return write_feeds(
+		merge_consecutive_days(stream_lecture_free_days(sqlhandlerObj, config, batch_size)),
+		ics_path, json_path)
+
+
+def feeds_outdated(feed_dir, amount_changed_rows):
+	"""Return whether the feeds have to be (re)generated.
+
+	This is the case if the sync has changed rows of the calendar
+	table or if a feed does not exist (yet).
+	"""
+	return amount_changed_rows > 0 or not all(os.path.isfile(path) for path in feed_paths(feed_dir))
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""
+Planning of the changes of a calendar sync (dry-run mode).
+
+The merged events (descriptions, dates) are compared against the rows
+of the calendar table within the date range of the events. Every event
+is classified as an insert (date not in the table) or a skip (date in
+the table). Like the sync, which never overwrites an existing date (see
+calendar_insert_statement()), a date with a different description in the
+table is a skip, which is noted as 'differs, kept'. The resulting
+changeset is written as JSON and as a compact text diff.
+"""
+
+import json
+
+import metrics
+
+
+def plan_changeset(insert_DB_events, DB_rows):
+	"""Classify the events (see events.EventList) into inserts and skips.
+
+	DB_rows are the (date, shortinfo) rows of the calendar table
+	(e.g., fetched via SqlHandler.fetch_table_range()). Returns a
+	dictionary containing the lists 'inserts' and 'skips' (sorted
+	by date) as well as the date range of the events. Skips whose
+	description differs from the table contain the kept
+	'db_description'.
+	"""
+	DB_descr_by_date = {}
+
+	for row in DB_rows:
+		DB_descr_by_date[str(row[0])] = row[1]
+
+	changeset = {
+		'date_from': None,
+		'date_to': None,
+		'inserts': [],
+		'skips': []
+	}
+
+	changeset['date_from'], changeset['date_to'] = insert_DB_events.date_range()
+
+	for event_date, event_descr in sorted(insert_DB_events):
+		if event_date not in DB_descr_by_date:
+			changeset['inserts'].append({'date': event_date, 'description': event_descr})
+		elif DB_descr_by_date[event_date] != event_descr:
+			# existing dates are never overwritten by the sync
+			changeset['skips'].append({
+				'date': event_date,
+				'description': event_descr,
+				'db_description': DB_descr_by_date[event_date]
+			})
+		else:
+			changeset['skips'].append({'date': event_date, 'description': event_descr})
+
+	return changeset
+
+
+def format_changeset_text(changeset):
+	"""Return the changeset as a compact text diff.
+
+	Inserts are marked with '+', skips whose description differs
+	from the table with '=' (kept -> extracted description); the
+	other skips are only counted.
+	"""
+	lines = [
+		'changeset ' + str(changeset['date_from']) + ' .. ' + str(changeset['date_to']) + ': ' +
+		str(len(changeset['inserts'])) + ' inserts, ' +
+		str(len(changeset['skips'])) + ' skips'
+	]
+
+	for entry in changeset['inserts']:
+		lines.append('+ ' + entry['date'] + ' | ' + entry['description'])
+
+	for entry in changeset['skips']:
+		if 'db_description' in entry:
+			lines.append('= ' + entry['date'] + ' | ' + entry['db_description'] + ' -> ' +
+				entry['description'] + ' (differs, kept)')
+
+	return '\n'.join(lines) + '\n'
+
+
+def write_changeset(changeset, json_path, text_path):
+	"""Write the changeset as JSON and as text diff to the given paths."""
+	metrics.write_atomic(json_path, json.dumps(changeset, indent = 4, ensure_ascii = False) + '\n')
+	metrics.write_atomic(text_path, format_changeset_text(changeset))
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+"""
+Compact container of the extracted events (date, description).
+
+Instead of two parallel lists of strings, the events are stored in two
+arrays: the dates as day ordinals (see datetime.date.toordinal()) and the
+descriptions as indices into a table of interned descriptions, i.e., a
+ranged event (e.g., 90 days of Sommerferien) stores its description once.
+"""
+
+import datetime
+
+from array import array
+
+
+def to_ordinal(event_date):
+	"""Convert a date ('JJJJ-MM-DD', datetime.date or day ordinal) into a day ordinal."""
+	if isinstance(event_date, int):
+		return event_date
+
+	if isinstance(event_date, str):
+		return datetime.date(int(event_date[0:4]), int(event_date[5:7]), int(event_date[8:10])).toordinal()
+
+	return event_date.toordinal()
+
+
+def to_date_str(ordinal):
+	"""Convert a day ordinal into the DB date format (JJJJ-MM-DD)."""
+	return datetime.date.fromordinal(ordinal).isoformat()
+
+
+class EventList:
+	"""List of events (date, description) in insertion order.
+
+	The dates are stored as day ordinals (array) and the
+	descriptions as indices (array) into a table of unique
+	(interned) descriptions. Iterating over the list yields
+	(date, description) tuples with the date formatted as
+	JJJJ-MM-DD.
+	"""
+	__slots__ = ('ordinals', 'descr_ids', 'descr_table', 'descr_index')
+
+	def __init__(self):
+		self.ordinals = array('i')
+		self.descr_ids = array('I')
+		self.descr_table = []
+		self.descr_index = {}
+
+	@classmethod
+	def from_lists(cls, event_descr, event_date):
+		"""Create an event list from two parallel lists (descriptions, dates)."""
+		if len(event_descr) != len(event_date):
+			raise IndexError('Number of event descriptions (' + str(len(event_descr)) +
+				') != number of event dates (' + str(len(event_date)) + ')')
+
+		return_events = cls()
+
+		for descr, date in zip(event_descr, event_date):
+			return_events.append(date, descr)
+
+		return return_events
+
+	def intern(self, event_descr):
+		"""Return the index of the description (adding it to the table if it is new)."""
+		descr_id = self.descr_index.get(event_descr)
+
+		if descr_id is None:
+			descr_id = len(self.descr_table)
+			self.descr_table.append(event_descr)
+			self.descr_index[event_descr] = descr_id
+
+		return descr_id
+
+	def append(self, event_date, event_descr):
+		"""Append a single event (date: 'JJJJ-MM-DD', datetime.date or day ordinal)."""
+		self.ordinals.append(to_ordinal(event_date))
+		self.descr_ids.append(self.intern(event_descr))
+
+	def append_range(self, first_date, last_date, event_descr, max_days = 366):
+		"""Append an event ranging from first_date to last_date (both inclusive).
+
+		Ranged events, e.g., semester breaks, may span over months.
+		If the range exceeds max_days (or ends before it starts),
+		something with the end date has gone wrong and an error is
+		raised.
+		"""
+		first_ordinal = to_ordinal(first_date)
+		last_ordinal = to_ordinal(last_date)
+
+		if not 0 <= last_ordinal - first_ordinal < max_days:
+			raise RuntimeError('Error creating the ranged data set for the event: ' +
+				event_descr + '(start: ' + to_date_str(first_ordinal) + '; end: ' +
+				to_date_str(last_ordinal) + ". Eventlength exceeded " + str(max_days - 1) + " days")
+
+		descr_id = self.intern(event_descr)
+		amount_days = last_ordinal - first_ordinal + 1
+
+		self.ordinals.extend(range(first_ordinal, last_ordinal + 1))
+		self.descr_ids.extend([descr_id] * amount_days)
+
+	def extend(self, other_events):
+		"""Append all events of another event list."""
+		for ordinal, event_descr in other_events.ordinal_items():
+			self.append(ordinal, event_descr)
+
+	def __len__(self):
+		return len(self.ordinals)
+
+	def __iter__(self):
+		for ordinal, event_descr in self.ordinal_items():
+			yield to_date_str(ordinal), event_descr
+
+	def __eq__(self, other):
+		if not isinstance(other, EventList):
+			return NotImplemented
+
+		return list(self.ordinal_items()) == list(other.ordinal_items())
+
+	def ordinal_items(self):
+		"""Iterate over the events as (day ordinal, description) tuples."""
+		descr_table = self.descr_table
+
+		for ordinal, descr_id in zip(self.ordinals, self.descr_ids):
+			yield ordinal, descr_table[descr_id]
+
+	def sorted_ordinal_items(self):
+		"""Return the events sorted by date (stable) as (day ordinal, description) tuples."""
+		descr_table = self.descr_table
+		order = sorted(range(len(self.ordinals)), key = self.ordinals.__getitem__)
+
+		return [(self.ordinals[k], descr_table[self.descr_ids[k]]) for k in order]
+
+	def dates(self):
+		"""Return the dates (JJJJ-MM-DD) of all events."""
+		return [to_date_str(ordinal) for ordinal in self.ordinals]
+
+	def descriptions(self):
+		"""Return the descriptions of all events."""
+		descr_table = self.descr_table
+
+		return [descr_table[descr_id] for descr_id in self.descr_ids]
+
+	def date_range(self):
+		"""Return the first and the last date (JJJJ-MM-DD) of the events."""
+		if not self.ordinals:
+			return None, None
+
+		return to_date_str(min(self.ordinals)), to_date_str(max(self.ordinals))
+
+	def years(self):
+		"""Return the (sorted) years of all events."""
+		return sorted({datetime.date.fromordinal(ordinal).year for ordinal in set(self.ordinals)})
+
+
+def merge_event_lists(event_lists, on_duplicate = None):
+	"""Merge several event lists into one with unique dates (per source).
+
+	The first list is used as the base list; the events of the
+	following lists are appended, except for dates which are
+	already present, in which case the descriptions are merged
+	(e.g., 'Weihnachtsferien, Christtag'). The lookup of the dates
+	is done via an index (date -> positions), i.e., the merge is
+	linear in the amount of events. The optional function
+	on_duplicate(merged_description) is called for every merged
+	duplicate. Returns the merged list and the amount of merged
+	duplicates.
+	"""
+	merged_events = EventList()
+	amount_duplicates_found = 0
+
+	if not event_lists:
+		return merged_events, amount_duplicates_found
+
+	merged_events.extend(event_lists[0])
+
+	# positions of every date in the merged list
+	date_positions = {}
+	for position, ordinal in enumerate(merged_events.ordinals):
+		date_positions.setdefault(ordinal, []).append(position)
+
+	for other_events in event_lists[1:]:
+		for ordinal, event_descr in other_events.ordinal_items():
+			positions = date_positions.get(ordinal)
+
+			if positions is None:
+				date_positions[ordinal] = [len(merged_events)]
+				merged_events.append(ordinal, event_descr)
+				continue
+
+			for position in positions:
+				merged_descr = merged_events.descr_table[merged_events.descr_ids[position]] + ', ' + event_descr
+				merged_events.descr_ids[position] = merged_events.intern(merged_descr)
+				amount_duplicates_found += 1
+
+				if on_duplicate is not None:
+					on_duplicate(merged_descr)
+
+	return merged_events, amount_duplicates_found
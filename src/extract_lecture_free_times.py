@@ -1,478 +1,609 @@
 #!/usr/bin/env python3
 
-import urllib.request
 import datetime
-import sqlhandler
-import numpy as np
+import time
+import events
+import metrics
 import pylogs
+import sources
+import statutory_holidays
 
-# sql DB variables
-from config import *
+# name of the (scraped) source of the statutory holidays (see sources.py)
+statutory_source_name = 'wien_statutory_holidays'
 
+# default (discarding) logger and metrics used when none are given
+_null_log = pylogs.null_logs()
+_null_metrics = metrics.null_metrics()
 
-def fetch_page(URL_to_be_fetched):
+
+def fetch_page(URL_to_be_fetched, metrics = _null_metrics, client = None):
 	"""Fetch the source code of a single page.
 
 	This function crawls the page and returns (upon sucessful
-	crawl) the source code of the given URL.
+	crawl) the source code of the given URL. The page is fetched
+	via the given (or a shared) keep-alive client (see httpclient.py)
+	which applies timeouts, retries transient errors and requests
+	the page compressed. The fetch (incl. the decompression) is
+	timed as stage 'fetch' and its duration, size and HTTP status
+	are recorded via metrics.
 	"""
+	if client is None:
+		client = shared_fetch_client()
+
+	t_start = time.perf_counter()
+
+	# get the source of the page (following redirects, retrying transient errors)
+	with metrics.stage('fetch'):
+		status, page_source, amount_transferred = client.fetch(URL_to_be_fetched)
 
-	# get the source of the page using urllib
-	fetched_page = urllib.request.urlopen(URL_to_be_fetched)
+	metrics.record_fetch(URL_to_be_fetched, time.perf_counter() - t_start, len(page_source), status)
+	metrics.increment('bytes_transferred', amount_transferred)
 
 	# check if the crawl was successful (via the HTTP response)
-	if (fetched_page.status != 200):
+	if (status != 200):
 		raise ConnectionError('Cannot fetch source of URL: ' + URL_to_be_fetched)
 	else:
-		return fetched_page.read()
+		return page_source
+
+
+_shared_fetch_client = None
+
+def shared_fetch_client():
+	"""Return the (lazily created) fetch client shared by all calls of fetch_page()."""
+	global _shared_fetch_client
+
+	if _shared_fetch_client is None:
+		# imported lazily (only needed once a page is actually fetched)
+		import httpclient
+		_shared_fetch_client = httpclient.FetchClient()
+
+	return _shared_fetch_client
 
 """
 Below are the two function which extract a list of dates
 corresponding to the dates at which the university is
 closed. The (desired DB-)date formatting is JJJJ-MM-DD, e.g., 2019-02-14.
 Both functions are URL-sensitive, i.e., when the crawled URL
-changes the corresponding function must be adapted.
+changes the corresponding source spec (see sources.py) must be adapted.
 """
 
-def extract_statutory_holidays(source_of_URL):
+def extract_statutory_holidays(source_of_URL, general_log = _null_log, source_cut_log = _null_log):
 	"""Fetch the statutory holidays from an URL and return the extracted data.
 
-	Whenever the URL (source_of_URL) changes, this function must be adapted.
-	First the function fetches the source code of the URL and the resulting
-	string is cut at certain spots (defined by cut_pos1 and cut_pos2). Then
-	the statutory holidays (incl. its description) are extracted, stored and
-	returned via a list (return_event_descr and return_event_date).
+	The extraction is performed by the shared engine (see
+	sources.extract_events()) using the source spec
+	'wien_statutory_holidays'. The statutory holidays (incl. its
+	description) are returned as event list (see events.EventList).
+	The (optional) logs general_log and
+	source_cut_log receive the runtime information and the cut page
+	source, respectively.
 	"""
+	return sources.extract_events(sources.get_source('wien_statutory_holidays'),
+		source_of_URL, general_log, source_cut_log)
 
-	general_log.append_to_log("starting extraction: statutory holidays")
 
-	# change the fetched data from byte to str
-	encoding = 'latin-1'
-	source_str_data = str(source_of_URL, encoding)
+def extract_academic_calendar(source_of_URL, general_log = _null_log, source_cut_log = _null_log):
+	"""Fetch the academic calendar from an URL and return the extracted data.
 
+	The extraction is performed by the shared engine (see
+	sources.extract_events()) using the source spec
+	'tuwien_academic_calendar'. The academic calendar (incl. its
+	description) is returned as event list (see events.EventList).
+	The (optional) logs general_log and
+	source_cut_log receive the runtime information and the cut page
+	source, respectively.
 	"""
-	Cut the string to contain only the relevant information.
-	The two cut points depend on a (unique) subset of the source.
-	The cut string containing the relevant source code is stored
-	in the variable 'cut_string'.
+	return sources.extract_events(sources.get_source('tuwien_academic_calendar'),
+		source_of_URL, general_log, source_cut_log)
+
+
+def merge_events(extracted_events, general_log = _null_log):
+	"""Merge the extracted events of several sources into one list.
+
+	The events are given as a list of event lists (see
+	events.EventList). The first one is used as the base list;
+	the events of the following ones are appended, except for
+	dates which are already present, in which case the
+	descriptions are merged (both descriptions are preserved).
+	Returns the merged event list and the amount of merged
+	duplicates.
 	"""
+	def log_duplicate(merged_description):
+		general_log.append_to_log("found and merged duplicates: " + merged_description)
 
-	cut_str_find1 = 'editableDocument'
-	cut_str_find2 = 'bde-stx-wrapper'
+	# remove duplicates and populate the (final) list
+	insert_DB_events, amount_duplicates_found = events.merge_event_lists(
+		extracted_events, log_duplicate)
 
-	cut_pos1 = source_str_data.find(cut_str_find1)
-	cut_pos2 = source_str_data.find(cut_str_find2)
-	cut_string = source_str_data[cut_pos1:cut_pos2]
+	print('found duplicates: ' + str(amount_duplicates_found))
 
-	general_log.append_to_log("cut position1: " + cut_str_find1)
-	general_log.append_to_log("cut position2: " + cut_str_find2)
+	return insert_DB_events, amount_duplicates_found
 
+
+def calendar_insert_statement(calendar_table):
+	"""Return the INSERT statement for a single event of the calendar table.
+
+	With the unique key on the date (see
+	SqlHandler.create_calendar_table()), the statement is an
+	upsert which keeps a row of the same date (e.g., inserted
+	meanwhile by another run) instead of duplicating it.
 	"""
-	extract the dates and information from the URL subset
-	data. Each single extraction event is enclosed in between:
-	'<li><span>Neujahr: Freitag, 1. Jänner 2021</span></li>',
-	which is used to extract the information.
-	"""
-	search_string1 = '<li><span>'
-	search_string2 = '</span>'
+	return (
+		"INSERT INTO " + calendar_table + " (date, vorlesungsfrei, shortinfo, longinfo, location, piclink, event) "
+		"VALUES (%s, %s, %s, %s, %s, %s, %s) "
+		"ON DUPLICATE KEY UPDATE date = date"
+	)
 
-	general_log.append_to_log("search string1: " + search_string1)
-	general_log.append_to_log("search string2: " + search_string2)
 
-	statutory_source_cut.dump_to_log(cut_string, "extracted part of the page source from which the events (dates, descriptions) will be extracted")
+def calendar_insert_data(event_date, event_descr):
+	"""Return the data (tuple) of calendar_insert_statement() for a single event."""
+	return (event_date, 1, event_descr, '', '', '', 0)
 
-	"""
-	Skip a certain amount of elements from the extractions as
-	defined by the variable 'skip_entries'. This depends on the
-	crawled data.
-	"""
-	skip_entries = 3
-	skip_pos = 0
-
-	return_event_descr = []
-	return_event_date = []
-
-	# process the string until an arbitrary length (100) of it is reached
-	while len(cut_string) > 100:
-		cut_pos3 = cut_string.find(search_string1)
-		cut_pos4 = cut_string.find(search_string2)
-
-		if skip_pos >= skip_entries:
-			# extract the event description and the date
-			event_extract = cut_string[cut_pos3 + len(search_string1):cut_pos4]
-			event_divider = ': '
-			pos_event_divider = event_extract.find(event_divider)
-			event_description = event_extract[:pos_event_divider]
-			event_date = event_extract[pos_event_divider + len(event_divider):]
-
-			"""
-			Convert the event_date (e.g. 'Donnerstag, 26. Oktober 2023')
-			into a DB format like '2023-10-04'.
-			"""
-			day = event_date[event_date.find(',') + 2:event_date.find('.')]
-			month = event_date[event_date.find('.') + 2:-5]
-			year = event_date[-4:]
-
-			# use a dictionary to convert the months (Dezember -> 12, etc.)
-			dict_months = {
-				'Jänner': '01',
-				'Februar': '02',
-				'März': '03',
-				'April': '04',
-				'Mai': '05',
-				'Juni': '06',
-				'Juli': '07',
-				'August': '08',
-				'September': '09',
-				'Oktober': '10',
-				'November': '11',
-				'Dezember': '12'
-			}
-
-			extracted_formatted_date = (
-				year + '-' + dict_months[month] +
-				'-' + '%02d' % (int(day),)
-			)
-
-			# append the found data to the arrays
-			return_event_descr.append(event_description)
-			return_event_date.append(extracted_formatted_date)
-
-		skip_pos += 1
-
-		# remove the found information (and redo the search)
-		cut_string = cut_string[cut_pos4 + len(search_string2):]
-
-		"""
-		raise an error in case the number of events does not match
-		the number of extracted dates
-		"""
-		if len(return_event_descr) != len(return_event_date):
-			raise IndexError('Number of extracted event descriptions (' +
-				str(len(return_event_descr)) + ') != number of event dates (' +
-				str(len(return_event_date)) + ')'
-			)
-
-	general_log.append_to_log("amount of events found (date): " + str(len(return_event_date)))
-	general_log.append_to_log("amount of events found (description): " + str(len(return_event_descr)))
-
-	# return the data through the function
-	return return_event_descr, return_event_date
-
-
-def extract_academic_calendar(source_of_URL):
-	"""Fetch the academic calendar from an URL and return the extracted data.
 
-	Whenever the URL (source_of_URL) changes, this function must be adapted.
-	First the function fetches the source code of the URL and the resulting
-	string is cut at certain spots (defined by cut_pos1 and cut_pos2). Then
-	the academic calendar (incl. its description) are extracted, stored and
-	returned via a list (return_event_descr and return_event_date).
+def read_calendar_snapshot(sqlhandlerObj, config, date_from, date_to, metrics = _null_metrics):
+	"""Read the (date, shortinfo) rows of the calendar table within a date range.
+
+	The rows are read within a read-only transaction (see
+	SqlHandler.fetch_table_range()). The read does not depend on
+	the extracted events, i.e., it may run concurrently to the
+	fetches of the pages (see main()).
 	"""
+	with metrics.stage('db_fetch'):
+		DB_rows, DB_columns = sqlhandlerObj.fetch_table_range(config.dbDatabase,
+			config.dbCalendarTable, date_from, date_to, 'date, shortinfo', read_only = True)
 
-	general_log.append_to_log("starting extraction: academic calendar")
-
-	def parse_single_date(event_string):
-		"""Extract/Convert a single date event.
-
-		This function parses a single event, e.g.,
-		'Montag, 15. November 2021' and returns the data formatted
-		to the user's desire (JJJJ-MM-DD).
-		"""
-
-		# use a dictionary to convert the months (Dezember -> 12, etc.)
-		dict_months = {
-			'Jänner': '01',
-			'Februar': '02',
-			'März': '03',
-			'April': '04',
-			'Mai': '05',
-			'Juni': '06',
-			'Juli': '07',
-			'August': '08',
-			'September': '09',
-			'Oktober': '10',
-			'November': '11',
-			'Dezember': '12'
-		}
-
-		# remove the name of the day (monday, tuesday, etc.)
-		event_string_clean = event_string[event_string.find(',') + 2:]
-
-		# extract day/month/year from the string
-		event_day = event_string_clean[0:2]
-		event_year = event_string_clean[-4:]
-		event_string_remove_year = event_string[:-5]
-		event_month = event_string_remove_year[event_string_remove_year.find('.') + 2:]
-
-		extracted_formatted_date = (
-			event_year + '-' + dict_months[event_month] +
-			'-' + '%02d' % (int(event_day),)
-		)
+	return list(DB_rows)
 
-		return extracted_formatted_date
 
-	# change the fetched data from byte to str
-	encoding = 'utf-8'
-	source_str_data = str(source_of_URL, encoding)
+def expected_date_range(jobs):
+	"""Return the date range (first, last day) expected to be covered by the events of the jobs.
 
+	The range spans the full calendar years of the (offline)
+	statutory holidays (see statutory_holiday_years()), which
+	include the years of all academic years of the jobs.
 	"""
-	Cut the string to contain only the relevant information.
-	The two cut points depend on a (unique) subset of the source.
-	The cut string containing the relevant source code is stored
-	in the variable 'cut_string'.
-	"""
+	first_year, last_year = statutory_holiday_years(jobs)
 
-	cut_str_find1 = 'aria-labelledby="c426624Heading140154">'
-	cut_str_find2 = 'wpGeneralContentElement wpContentElementText wpGeneralTextStyling'
+	return str(first_year) + '-01-01', str(last_year) + '-12-31'
 
-	cut_pos1 = source_str_data.find(cut_str_find1)
-	cut_pos2 = source_str_data.find(cut_str_find2)
-	cut_string = source_str_data[cut_pos1:cut_pos2]
 
-	# remove whitespaces from the string (&nbsp;)
-	cut_string = cut_string.replace('&nbsp; ', '')
-	cut_string = cut_string.replace('&nbsp;', '')
+def missing_date_ranges(snapshot_from, snapshot_to, insert_DB_events):
+	"""Return the date ranges of the events which are not covered by a snapshot range."""
+	date_from, date_to = insert_DB_events.date_range()
+	return_ranges = []
 
-	academic_cal_source_cut.dump_to_log(cut_string, "extracted part of the page source from which the events (dates, descriptions) will be extracted")
+	if date_from is None:
+		return return_ranges
 
-	general_log.append_to_log("cut position1: " + cut_str_find1)
-	general_log.append_to_log("cut position2: " + cut_str_find2)
+	if date_from < snapshot_from:
+		return_ranges.append((date_from, events.to_date_str(events.to_ordinal(snapshot_from) - 1)))
 
+	if date_to > snapshot_to:
+		return_ranges.append((events.to_date_str(events.to_ordinal(snapshot_to) + 1), date_to))
+
+	return return_ranges
+
+
+def sync_events(sqlhandlerObj, config, insert_DB_events,
+	general_log = _null_log, metrics = _null_metrics, DB_rows = None):
+	"""Insert the (merged) events into the calendar table of the DB.
+
+	The rows of the calendar table are given as DB_rows (e.g.,
+	read concurrently via read_calendar_snapshot()) or, if not
+	given, all rows of the table are fetched first; events whose
+	date is already present in the table are skipped, the remaining
+	ones are inserted. The stages (DB fetch, existence check, insert)
+	are timed via metrics. Returns the amount of inserted rows.
 	"""
-	extract the dates and information from the URL subset
-	data. Each single extraction event (incl. removed whitespaces)
-	is enclosed in between: '<li>Allerseelen:&nbsp; &nbsp; &nbsp; 
-	&nbsp; &nbsp; &nbsp; &nbsp; &nbsp; &nbsp; &nbsp; &nbsp; &nbsp;
-	Mittwoch, 02. November 2022</li>', which is used to extract the
-	information.
-	"""
-	search_string1 = '<li>'
-	search_string2 = '</li>'
+	if DB_rows is None:
+		# fetch the information about the dates/events present (pre insert) in the database
+		with metrics.stage('db_fetch'):
+			getTableData = sqlhandlerObj.fetch_table_content(config.dbDatabase, config.dbCalendarTable)
 
-	general_log.append_to_log("search string1: " + search_string1)
-	general_log.append_to_log("search string2: " + search_string2)
+		# remove the header information (stored in getTableData[1])
+		DB_rows = getTableData[0]
 
-	return_event_descr = []
-	return_event_date = []
+	# search the fetched DB data whether the dates to be inserted are already
+	# in the DB (the dates are kept as day ordinals in a set for O(1) lookups)
+	with metrics.stage('existence_check'):
+		DB_fetch_dates = {events.to_ordinal(row[0]) for row in DB_rows}
 
-	# process the string until an arbitrary length (150) of it is reached
-	while len(cut_string) > 150:
-		cut_pos3 = cut_string.find(search_string1)
-		cut_pos4 = cut_string.find(search_string2)
+		checked_events = [
+			(ordinal, event_descr, ordinal in DB_fetch_dates)
+			for ordinal, event_descr in insert_DB_events.ordinal_items()
+		]
 
-		# extract the event description and the date
-		event_extract = cut_string[cut_pos3 + len(search_string1):cut_pos4]
+	count_position = 1
+	amount_inserted = 0
 
-		# get the event description
-		event_description = event_extract[0:event_extract.find(':')]
+	for k, (ordinal, event_descr, date_in_DB) in enumerate(checked_events):
+		event_date = events.to_date_str(ordinal)
 
-		# extract the event date(s)
-		event_date_raw = event_extract[len(event_description) + 1:].strip()
+		# check if the date to be inserted is already in the DB
+		if (date_in_DB == False):
+			print(str(k) + '|' + event_date + '|' + event_descr)
+			general_log.append_to_log("event " + str(count_position) + " added to the database: " + event_date + " | " + event_descr)
 
-		# determine: single or range event
-		single_event = event_date_raw.find('bis')
+			# insert the data into the DB
+			insertStatement = calendar_insert_statement(config.dbCalendarTable)
+			insertData = calendar_insert_data(event_date, event_descr)
 
-		# single event means a single day event, else, i.e., not minus one indicates
-		# an event ranging over multiple days
-		if single_event == -1:
-			single_date_str_parsed = parse_single_date(event_date_raw)
+			with metrics.stage('insert'):
+				sqlhandlerObj.insert_into_table(config.dbDatabase, insertStatement, insertData, 0)
 
-			return_event_descr.append(event_description)
-			return_event_date.append(single_date_str_parsed)
+			metrics.increment('rows_inserted')
+			amount_inserted += 1
 		else:
-			event_date_start = event_date_raw[:single_event - 1]
-			event_date_end = event_date_raw[single_event + 4:]
+			print(str(k) + '| alread in DB: ' + event_date + '|' + event_descr)
+			general_log.append_to_log("event " + str(count_position) + " already in database: " + event_date + " | " + event_descr)
+			metrics.increment('rows_already_present')
+
+		count_position += 1
+
+	return amount_inserted
+
+
+def backfill_events(sqlhandlerObj, config, insert_DB_events,
+	general_log = _null_log, metrics = _null_metrics, DB_rows = None):
+	"""Bulk-load the (merged) events of several years into the calendar table.
 
-			event_date_start_formatted = parse_single_date(event_date_start)
-			event_date_end_formatted = parse_single_date(event_date_end)
+	Unless the rows of the table are given as DB_rows (see
+	read_calendar_snapshot()), only the dates within the range of
+	the events are read from the table; events whose date is
+	already present are skipped. The
+	remaining events are grouped by academic year (starting on the
+	1st of October, see sources.current_academic_year()) and
+	inserted using a single connection with one transaction per
+	academic year (see SqlHandler.insert_batches_into_table()).
+	Returns the amount of inserted rows.
+	"""
+	if not insert_DB_events:
+		return 0
+
+	if DB_rows is None:
+		date_from, date_to = insert_DB_events.date_range()
+
+		with metrics.stage('db_fetch'):
+			DB_rows, DB_columns = sqlhandlerObj.fetch_table_range(config.dbDatabase,
+				config.dbCalendarTable, date_from, date_to, 'date')
 
-			return_event_descr.append(event_description)
-			return_event_date.append(event_date_start_formatted)
+	with metrics.stage('existence_check'):
+		DB_fetch_dates = {events.to_ordinal(row[0]) for row in DB_rows}
 
-			# generate dates for this event between start and end of it
-			year = event_date_start_formatted[0:4]
-			month = event_date_start_formatted[5:7]
-			day = event_date_start_formatted[8:]
+		insert_batches = {}
 
-			date = datetime.datetime(int(year), int(month), int(day))
-			end_reached = False
+		for ordinal, event_descr in insert_DB_events.sorted_ordinal_items():
+			if ordinal in DB_fetch_dates:
+				metrics.increment('rows_already_present')
+				continue
 
-			# populate ranged events, e.g., semester breaks
-			# which spans over months. If this range exceeds
-			# one year, something with the end date gone wrong!
-			for i in range(365): 
-				date += datetime.timedelta(days = 1)
-				extract_date = date.strftime("%Y-%m-%d")
+			event_date = events.to_date_str(ordinal)
+			academic_year = sources.current_academic_year(datetime.date.fromordinal(ordinal))
+			insert_batches.setdefault(academic_year, []).append(
+				calendar_insert_data(event_date, event_descr))
 
-				return_event_descr.append(event_description)
-				return_event_date.append(extract_date)
+	for academic_year, insert_batch in insert_batches.items():
+		general_log.append_to_log("backfill: inserting " + str(len(insert_batch)) +
+			" events of the academic year " + str(academic_year) + "-" + '%02d' % ((academic_year + 1) % 100))
 
-				if (extract_date == event_date_end_formatted):
-					end_reached = True
-					break
+	with metrics.stage('insert'):
+		amount_inserted = sqlhandlerObj.insert_batches_into_table(config.dbDatabase,
+			calendar_insert_statement(config.dbCalendarTable), list(insert_batches.values()))
 
-			if (end_reached == False):
-				# check the end date
-				raise RuntimeError('Error creating the ranged data set for the event: ' +
-				event_description + '(start: ' + event_date_start_formatted + '; end: ' +
-				event_date_end_formatted + ". Eventlength exceeded 365 days")
+	metrics.increment('rows_inserted', amount_inserted)
+	general_log.append_to_log("backfill: amount of inserted events: " + str(amount_inserted))
 
-		# remove the found information (and redo the search)
-		cut_string = cut_string[cut_pos4 + len(search_string2):]
+	return amount_inserted
 
+
+def statutory_holiday_years(jobs):
+	"""Return the span of years (first, last) for the offline statutory holidays.
+
+	Like the page of the statutory holidays, the span covers the
+	current year and the two following ones; additionally it is
+	extended to cover all (academic) years of the given jobs.
 	"""
-	raise an error in case the number of events does not match
-	the number of extracted dates
+	current_year = datetime.date.today().year
+	first_year, last_year = current_year, current_year + 2
+
+	for spec, year in jobs:
+		if year is not None:
+			first_year = min(first_year, year)
+			last_year = max(last_year, year + 1)
+
+	return first_year, last_year
+
+
+def parse_year_span(year_span):
+	"""Convert a span of (academic) years, e.g., '2013-2022', into a list of years.
+
+	The years are the first years of the academic years, i.e.,
+	'2021-2022' stands for the academic years 2021-22 and 2022-23.
+	A single year (e.g., '2022') is accepted as well.
 	"""
-	if len(return_event_descr) != len(return_event_date):
-		raise IndexError('Number of extracted event descriptions (' +
-			str(len(return_event_descr)) + ') != number of event dates (' +
-			str(len(return_event_date)) + ')'
-		)
+	first_year, separator, last_year = year_span.partition('-')
+
+	if not separator:
+		last_year = first_year
+
+	first_year, last_year = int(first_year), int(last_year)
+
+	if last_year < first_year:
+		raise ValueError('Invalid span of years: ' + year_span)
+
+	return list(range(first_year, last_year + 1))
+
+
+def parse_arguments(argv = None):
+	"""Parse the command line arguments of the program."""
+	import argparse
+
+	parser = argparse.ArgumentParser(description = 'Extract the lecture-free times '
+		'(academic calendar, statutory holidays) and insert them into the database.')
+	parser.add_argument('--metrics-json', default = None,
+		help = 'path of the JSON summary of the run (default: next to the general log in logs/)')
+	parser.add_argument('--metrics-prom', default = 'logs/lecture_free_times.prom',
+		help = 'path of the Prometheus textfile-collector file (default: %(default)s)')
+	parser.add_argument('--backfill', type = parse_year_span, default = None, metavar = 'FIRST-LAST',
+		help = 'load the academic calendars of a span of (academic) years, e.g., 2013-2022, '
+		'concurrently and bulk-load them into the DB (one transaction per year)')
+	parser.add_argument('--statutory-source', choices = ('offline', 'scrape'), default = 'offline',
+		help = 'generate the statutory holidays locally (offline) or extract them from '
+		'the page of the statutory holidays (scrape) (default: %(default)s)')
+	parser.add_argument('--cross-check', action = 'store_true',
+		help = 'additionally fetch the page of the statutory holidays and cross-check '
+		'the generated (offline) statutory holidays against it')
+	parser.add_argument('--dry-run', action = 'store_true',
+		help = 'only plan the changes (inserts, skips) using a single read-only '
+		'connection and write them as changeset (JSON, text) next to the general log')
+	parser.add_argument('--setup-table', action = 'store_true',
+		help = 'create the calendar table (unique key on the date, indexes) or add its '
+		'missing indexes before syncing')
+	parser.add_argument('--partition-years', type = parse_year_span, default = None, metavar = 'FIRST-LAST',
+		help = 'with --setup-table: partition the calendar table by academic year, e.g., '
+		'2013-2030 (missing later years are added to a partitioned table)')
+	parser.add_argument('--feed-dir', default = None,
+		help = 'write the lecture-free times as iCalendar and JSON feed into this directory '
+		'(regenerated only if the sync has changed rows or a feed is missing)')
+	parser.add_argument('--profile', action = 'store_true',
+		help = 'profile the pipeline stages (cProfile, tracemalloc) and write the '
+		'reports (.pstats, peak memory) next to the general log in logs/')
+
+	return parser.parse_args(argv)
+
+
+def main(argv = None):
+	"""Fetch, extract and merge the lecture-free times and insert them into the DB.
+
+	This is the entry point of the program. The configuration
+	(login credentials and DB endpoints) is loaded explicitly
+	here and the (heavier) SQL dependencies are only imported
+	once they are needed, so that importing this module is
+	free of side effects. The timings of all stages as well as
+	the counts of the run are written as a JSON summary and as
+	a Prometheus textfile (see metrics.py). In the profile mode
+	(--profile), the stages are additionally profiled (see
+	profiling.py) and run sequentially. In the dry-run mode
+	(--dry-run), nothing is written into the DB; the planned
+	changes are written as changeset instead (see changeset.py).
+	The backfill mode (--backfill) loads the academic calendars
+	of a span of years in one pass. The statutory holidays are
+	generated offline (see statutory_holidays.py) unless they are
+	scraped (--statutory-source scrape); the scraped page may be
+	used to cross-check the generated ones (--cross-check). The
+	rows of the calendar table (DB snapshot) are read concurrently
+	to the fetches of the pages and joined before the existence
+	check. If a feed directory is given (--feed-dir), the
+	calendar feeds (see calendar_feed.py) are regenerated when
+	the sync has changed rows.
+	"""
+	import sqlhandler
+
+	arguments = parse_arguments(argv)
+	config = sqlhandler.load_config()
+
+	if arguments.profile:
+		import profiling
+		run_metrics = profiling.ProfilingMetrics()
+	else:
+		run_metrics = metrics.PipelineMetrics()
+
+	## initiate log files
+	general_log = pylogs.logs("logs/", "general_log")
+
+	general_log.append_to_log("program start")
 
-	general_log.append_to_log("amount of events found (date): " + str(len(return_event_date)))
-	general_log.append_to_log("amount of events found (description): " + str(len(return_event_descr)))
-
-	# return the data through the function
-	return return_event_descr, return_event_date
+	## crawl the data (fetch the source code of the URLs) ##
 
-## initiate log files
-general_log = pylogs.logs("logs/", "general_log")
-statutory_source = pylogs.logs("logs/", "statutory_source")
-academic_cal_source = pylogs.logs("logs/", "academic_calendar_source")
-statutory_source_cut = pylogs.logs("logs/", "statutory_source_cut")
-academic_cal_source_cut = pylogs.logs("logs/", "academic_calendar_source_cut")
-
-general_log.append_to_log("program start")
-
-## crawl the data (fetch the source code of the URLs) ##
-
-# URL for the data which is to be crawled and processed
-#academic_calendar_URL = 'https://www.tuwien.at/studium/akademischer-kalender/studienjahr-2021-22'
-academic_calendar_URL = 'https://www.tuwien.at/studium/zulassung/akademischer-kalender/studienjahr-2022-23'
-general_log.append_to_log("academic_calendar_URL: " + academic_calendar_URL)
-statutory_holidays_URL = 'https://www.wien.gv.at/amtshelfer/feiertage/'
-general_log.append_to_log("statutory_holidays_URL: " + statutory_holidays_URL)
-
-## statutory holidays ##
-# fetch the page source code (statutory holidays)
-statutory_holidays_source = fetch_page(statutory_holidays_URL)
-statutory_source.dump_to_log(str(statutory_holidays_source), "raw fetched page for the statutory holidays which will be processed")
-
-# extract the dates and descriptions from the crawled page
-return_event_descr_stat_hol, return_event_date_stat_hol = extract_statutory_holidays(
-	statutory_holidays_source
-)
-
-# print the fetched and extracted data (statutory holidays)
-general_log.append_to_log("extracted statutory holidays (event_description | event_date):")
-for i in range(len(return_event_descr_stat_hol)):
-	print('stat hol: ' + return_event_descr_stat_hol[i] + ' | ' + return_event_date_stat_hol[i])
-	general_log.append_to_log("   " + return_event_descr_stat_hol[i] + ' | ' + return_event_date_stat_hol[i])
-
-
-## academic calendar ##
-# fetch the page source code (academic calendar)
-academic_calendar_source = fetch_page(academic_calendar_URL)
-academic_cal_source.dump_to_log(str(academic_calendar_source), "raw fetched page for the statutory holidays which will be processed")
-
-# extract the dates and descriptions from the crawled page
-return_event_descr_ac_cal, return_event_date_ac_cal = extract_academic_calendar(academic_calendar_source)
-print('\n')
-general_log.append_to_log("extracted academic calendar (event_description | event_date):")
-for i in range(len(return_event_descr_ac_cal)):
-	print('ac cal: ' + return_event_descr_ac_cal[i] + '|' + return_event_date_ac_cal[i])
-	general_log.append_to_log("   " + return_event_descr_ac_cal[i] + ' | ' + return_event_date_ac_cal[i])
-
-## check for duplicates ##
-
-#Both extracted data sets (statutory holidays and academic calendar) are going to be
-#inserted into a database (DB). If any date coincides, i.e., when a date is both a statutory
-#holiday as well a free day in the academic calendar, the former date may be overwritten
-#in the DB. Therefore, check for duplicate dates and merge the description (of the event) in
-#that case.
-
-general_log.append_to_log("removing/merging duplicates (overlaps in the statutory holidays and academic calendar)")
-
-print('len (dates) stat holiday:  ' + str(len(return_event_date_stat_hol)))
-print('len (dates) acad calendar: ' + str(len(return_event_date_ac_cal)))
-
-# merge the two lists into one with unique (date) entries
-insert_DB_event_descr = return_event_descr_ac_cal
-insert_DB_event_date = return_event_date_ac_cal
-
-amount_duplicates_found = 0
-
-# remove duplicates and populate the (final) list
-for i in range(len(return_event_date_stat_hol)):
-	found_duplicate = False
-	for j in range(len(insert_DB_event_date)):
-		if(return_event_date_stat_hol[i] == insert_DB_event_date[j]):
-			insert_DB_event_descr[j] = insert_DB_event_descr[j] + ', ' + return_event_descr_stat_hol[i]
-			found_duplicate = True
-			amount_duplicates_found += 1
-			print('found duplicate: ' + str(amount_duplicates_found))
-			general_log.append_to_log("found and merged duplicates: " + insert_DB_event_descr[j])
-	if (found_duplicate == False):
-		insert_DB_event_date.append(return_event_date_stat_hol[i])
-		insert_DB_event_descr.append(return_event_descr_stat_hol[i])
-
-print('\n\nlen (descr) final insert:  ' + str(len(insert_DB_event_descr)))
-print('len (dates) final insert: ' + str(len(insert_DB_event_date)))
-
-general_log.append_to_log("amount of found and merged duplicates: " + str(amount_duplicates_found))
-general_log.append_to_log("final length of list (dates): " + str(len(insert_DB_event_date)))
-general_log.append_to_log("final length of list (descriptions): " + str(len(insert_DB_event_descr)))
-
-## insert the dates in the database (if they are not already in the DB) ##
-general_log.append_to_log("adding extracted events into the database")
-
-# sql handler initialisation
-sqlhandlerObj = sqlhandler.SqlHandler()
-
-# fetch the information about the dates/events present (pre insert) in the database
-getTableData = sqlhandlerObj.fetch_table_content(dbDatabase, dbCalendarTable)
-
-# convert the table data into a numpy array
-arr = np.array(getTableData[0], dtype = object)
-
-# remove the header information (stored in getTableData[1]) and
-# slice the array (to contain only dates)
-DB_fetch_dates_slice = arr[:, 0:1]
-count_position = 1
-
-for k in range(len(insert_DB_event_date)):
-	# cut the date str for checking against the DB
-	check_year = insert_DB_event_date[k][0:4]
-	check_month = insert_DB_event_date[k][5:7]
-	check_day = insert_DB_event_date[k][8:]
-
-	# search the fetched DB data whether the date to be inserted
-	# is already in the DB
-	rows = np.where(DB_fetch_dates_slice == datetime.date(int(check_year),
-		int(check_month), int(check_day)))
-
-	# check if the date to be inserted is already in the DB
-	if (len(DB_fetch_dates_slice[rows]) == 0):
-		print("CHECK|", check_year, "|", check_month, "|", check_day)
-		print(str(k) + '|' + insert_DB_event_date[k] + '|' + insert_DB_event_descr[k])
-		print(" -> OO: ", insert_DB_event_date[k], " || ", len(DB_fetch_dates_slice[rows]), " | ", rows)
-		print()
-		general_log.append_to_log("event " + str(count_position) + " added to the database: " + insert_DB_event_date[k] + " | " + insert_DB_event_descr[k])
-
-		# insert the data into the DB
-		insertStatement = (
-			"INSERT INTO " + dbCalendarTable + " (date, vorlesungsfrei, shortinfo, longinfo, location, piclink, event) "
-			"VALUES (%s, %s, %s, %s, %s, %s, %s)"
+	# all registered sources (see sources.py) are fetched and extracted concurrently,
+	# for all years of the backfill (if given)
+	fetch_statutory_source = arguments.statutory_source == 'scrape' or arguments.cross_check
+
+	crawl_sources = [
+		spec for spec in sources.registered_sources()
+		if spec.name != statutory_source_name or fetch_statutory_source
+	]
+
+	jobs = sources.source_jobs(crawl_sources, years = arguments.backfill)
+
+	## read the DB snapshot (concurrently to the fetches) ##
+
+	# the range read only depends on the years of the jobs (not on the extracted
+	# events), hence it runs in the background while the pages are fetched and
+	# extracted and is joined before the existence check
+	from concurrent.futures import ThreadPoolExecutor
+
+	sqlhandlerObj = sqlhandler.SqlHandler(config)
+
+	# managed layout of the calendar table (idempotent)
+	if arguments.setup_table and not arguments.dry_run:
+		for statement in sqlhandlerObj.create_calendar_table(config.dbDatabase,
+			config.dbCalendarTable, arguments.partition_years):
+			general_log.append_to_log("calendar table: " + statement)
+
+	snapshot_from, snapshot_to = expected_date_range(jobs)
+	general_log.append_to_log("reading DB snapshot: " + snapshot_from + " - " + snapshot_to)
+
+	snapshot_executor = ThreadPoolExecutor(max_workers = 1)
+	DB_snapshot = snapshot_executor.submit(read_calendar_snapshot,
+		sqlhandlerObj, config, snapshot_from, snapshot_to, run_metrics)
+
+	# profiled stages must not overlap (see profiling.py)
+	if arguments.profile:
+		DB_snapshot.result()
+
+	# pages of single years may be missing when backfilling (skipped); the page of the
+	# statutory holidays is only needed for the sync when scraping them
+	fetch_client = shared_fetch_client()
+	optional_sources = (statutory_source_name,) if arguments.statutory_source == 'offline' else ()
+
+	try:
+		extracted_sources = sources.run_sources(jobs,
+			lambda URL: fetch_page(URL, run_metrics, fetch_client), general_log,
+			lambda filename: pylogs.logs("logs/", filename),
+			max_workers = 1 if arguments.profile else 16, metrics = run_metrics,
+			raise_errors = arguments.backfill is None, optional_sources = optional_sources)
+	finally:
+		fetch_client.close()
+		snapshot_executor.shutdown(wait = False)
+
+	# (name, events) of all sources which are merged (see events.EventList)
+	merge_sources = [
+		(spec.name, return_events)
+		for spec, year, return_events in extracted_sources
+		if spec.name != statutory_source_name or arguments.statutory_source == 'scrape'
+	]
+
+	## statutory holidays (offline) ##
+	if arguments.statutory_source == 'offline':
+		first_year, last_year = statutory_holiday_years(jobs)
+
+		with run_metrics.stage('generate'):
+			generated_events = statutory_holidays.generate_statutory_holidays(first_year, last_year)
+
+		general_log.append_to_log("generated statutory holidays (offline): " + str(first_year) + " - " + str(last_year))
+		merge_sources.append(('statutory_holidays_offline', generated_events))
+
+		# cross-check the generated statutory holidays against the scraped ones
+		cross_checked = False
+
+		for spec, year, scraped_events in extracted_sources:
+			if spec.name != statutory_source_name:
+				continue
+
+			cross_checked = True
+
+			differences = statutory_holidays.cross_check_holidays(generated_events, scraped_events)
+			run_metrics.increment('statutory_cross_check_differences', len(differences))
+
+			general_log.append_to_log("cross-check of the statutory holidays: " + str(len(differences)) + " differences")
+			for difference in differences:
+				print('cross-check statutory holidays: ' + difference)
+				general_log.append_to_log("   " + difference)
+
+		if arguments.cross_check and not cross_checked:
+			general_log.append_to_log("cross-check of the statutory holidays skipped (page not available)")
+
+	# print the fetched and extracted data
+	for source_name, return_events in merge_sources:
+		general_log.append_to_log("extracted " + source_name + " (event_description | event_date):")
+		for event_date, event_descr in return_events:
+			print(source_name + ': ' + event_descr + ' | ' + event_date)
+			general_log.append_to_log("   " + event_descr + ' | ' + event_date)
+		print('\n')
+
+	## check for duplicates ##
+
+	#All extracted data sets (e.g., academic calendar and statutory holidays) are going to be
+	#inserted into a database (DB). If any date coincides, i.e., when a date is both a statutory
+	#holiday as well a free day in the academic calendar, the former date may be overwritten
+	#in the DB. Therefore, check for duplicate dates and merge the description (of the event) in
+	#that case.
+
+	general_log.append_to_log("removing/merging duplicates (overlaps in the extracted sources)")
+
+	for source_name, return_events in merge_sources:
+		print('len (events) ' + source_name + ': ' + str(len(return_events)))
+
+	# merge the lists into one with unique (date) entries
+	with run_metrics.stage('merge'):
+		insert_DB_events, amount_duplicates_found = merge_events(
+			[return_events for source_name, return_events in merge_sources], general_log
 		)
-		insertData = (insert_DB_event_date[k], 1, insert_DB_event_descr[k], '', '', '', 0)
 
-		sqlhandlerObj.insert_into_table(dbDatabase, insertStatement, insertData, 0)
+	run_metrics.increment('duplicates_merged', amount_duplicates_found)
+
+	print('\n\nlen (events) final insert: ' + str(len(insert_DB_events)))
+
+	general_log.append_to_log("amount of found and merged duplicates: " + str(amount_duplicates_found))
+	general_log.append_to_log("final length of list (events): " + str(len(insert_DB_events)))
+
+	## join the DB snapshot ##
+
+	with run_metrics.stage('db_snapshot_wait'):
+		DB_rows = DB_snapshot.result()
+
+	# events outside of the expected range (e.g., further years on a scraped page)
+	for date_from, date_to in missing_date_ranges(snapshot_from, snapshot_to, insert_DB_events):
+		general_log.append_to_log("reading DB snapshot (events outside of the expected range): " + date_from + " - " + date_to)
+		DB_rows.extend(read_calendar_snapshot(sqlhandlerObj, config, date_from, date_to, run_metrics))
+
+	general_log.append_to_log("DB snapshot: " + str(len(DB_rows)) + " rows")
+
+	## insert the dates in the database (if they are not already in the DB) ##
+
+	if arguments.dry_run:
+		general_log.append_to_log("dry run: planning the changes (no writes)")
+
+		import changeset
+
+		with run_metrics.stage('plan'):
+			planned_changes = changeset.plan_changeset(insert_DB_events, DB_rows)
+
+		changeset.write_changeset(planned_changes,
+			general_log.log_prefix + " changeset.json", general_log.log_prefix + " changeset.txt")
+
+		print(changeset.format_changeset_text(planned_changes))
+		general_log.append_to_log("changeset written to: " + general_log.log_prefix + " changeset.json/.txt")
+	elif arguments.backfill is not None:
+		general_log.append_to_log("backfilling extracted events into the database")
+
+		amount_inserted = backfill_events(sqlhandlerObj, config, insert_DB_events, general_log, run_metrics, DB_rows)
 	else:
-		print(str(k) + '| alread in DB: ' + insert_DB_event_date[k] + '|' + insert_DB_event_descr[k])
-		general_log.append_to_log("event " + str(count_position) + " already in database: " + insert_DB_event_date[k] + " | " + insert_DB_event_descr[k])
+		general_log.append_to_log("adding extracted events into the database")
+
+		amount_inserted = sync_events(sqlhandlerObj, config, insert_DB_events, general_log, run_metrics, DB_rows)
+
+	## calendar feeds (iCalendar, JSON) ##
+	if arguments.feed_dir is not None and not arguments.dry_run:
+		import calendar_feed
+
+		if calendar_feed.feeds_outdated(arguments.feed_dir, amount_inserted):
+			with run_metrics.stage('feed'):
+				amount_feed_events = calendar_feed.generate_feeds(sqlhandlerObj, config, arguments.feed_dir)
+
+			run_metrics.increment('feed_events', amount_feed_events)
+			general_log.append_to_log("calendar feeds written to: " + arguments.feed_dir + " (" + str(amount_feed_events) + " events)")
+		else:
+			general_log.append_to_log("calendar feeds unchanged (no rows changed by the sync)")
+
+	run_metrics.increment('connections_opened', sqlhandlerObj.connection_count)
+
+	## export the metrics of this run ##
+	metrics_json_path = arguments.metrics_json
+	if metrics_json_path is None:
+		metrics_json_path = general_log.log_prefix + " metrics.json"
+
+	run_metrics.write_json(metrics_json_path)
+	run_metrics.write_prometheus(arguments.metrics_prom)
+	general_log.append_to_log("metrics written to: " + metrics_json_path + ", " + arguments.metrics_prom)
+
+	if arguments.profile:
+		for profile_file in run_metrics.write_reports(general_log.log_prefix):
+			general_log.append_to_log("profile written to: " + profile_file)
+
+	general_log.append_to_log("stopping program (finished)")
 
-	count_position += 1
 
-general_log.append_to_log("stopping program (finished)")
+if __name__ == "__main__":
+	main()
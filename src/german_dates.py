@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Grammar of the (german) dates on the crawled pages.
+
+All sources (see sources.py) parse their dates via this module, e.g.,
+'Montag, 15. November 2021', '1. Jänner 2022', '24. Dez. 2022',
+'15.11.2021' and ranges such as 'Freitag, 23. Dezember 2022 bis Samstag,
+07. Jänner 2023' or '23. bis 27. Mai 2022'. The patterns are compiled
+once and the results of repeated strings are memoized; parse_dates()
+parses a whole batch of strings at once.
+"""
+
+import datetime
+import re
+
+from functools import lru_cache
+
+# names (incl. austrian variants and abbreviations) of the months (lower case)
+month_numbers = {
+	'jänner': 1, 'januar': 1, 'jän': 1, 'jan': 1,
+	'feber': 2, 'februar': 2, 'feb': 2,
+	'märz': 3, 'maerz': 3, 'mär': 3, 'mrz': 3,
+	'april': 4, 'apr': 4,
+	'mai': 5,
+	'juni': 6, 'jun': 6,
+	'juli': 7, 'jul': 7,
+	'august': 8, 'aug': 8,
+	'september': 9, 'sept': 9, 'sep': 9,
+	'oktober': 10, 'okt': 10,
+	'november': 11, 'nov': 11,
+	'dezember': 12, 'dez': 12
+}
+
+# a single date: optional name of the day, day, month (name or number), optional year;
+# month and year may be omitted in the first date of a range ('23. bis 27. Mai 2022')
+date_pattern = re.compile(
+	r'^(?:[^\W\d_]+\.?\s*,?\s*)?'
+	r'(?P<day>\d{1,2})\.?\s*'
+	r'(?:(?P<month_name>[^\W\d_]+)\.?|(?P<month_number>\d{1,2})\.)?\s*'
+	r'(?P<year>\d{4})?$'
+)
+
+# separator of the first and the last date of a range
+range_pattern = re.compile(r'\s+bis\s+|\s*[–—]\s*|\s+-\s+')
+
+
+def parse_date_parts(date_string):
+	"""Split a single date into (day, month, year); month and year may be None."""
+	match = date_pattern.match(date_string.strip())
+
+	if match is None:
+		raise ValueError('Invalid date: ' + date_string)
+
+	if match.group('month_name') is not None:
+		month = month_numbers.get(match.group('month_name').lower())
+
+		if month is None:
+			raise ValueError('Unknown month in date: ' + date_string)
+	elif match.group('month_number') is not None:
+		month = int(match.group('month_number'))
+	else:
+		month = None
+
+	year = match.group('year')
+
+	return int(match.group('day')), month, int(year) if year is not None else None
+
+
+def to_date(year, month, day, date_string):
+	"""Return the date (datetime.date) of the given parts (of date_string)."""
+	try:
+		return datetime.date(year, month, day)
+	except ValueError as error:
+		raise ValueError('Invalid date: ' + date_string + ' (' + str(error) + ')')
+
+
+@lru_cache(maxsize = 4096)
+def parse_date_span(date_string, allow_range = True):
+	"""Convert a single date or a range of dates into day ordinals (first, last).
+
+	For a single date, first and last are equal. A missing month of
+	the first date of a range is the month of the last date or the
+	month before (e.g., '30. bis 2. Jänner 2023' starts in December
+	2022), a missing year is the year of the last date or the year
+	before ('30. Dezember bis 2. Jänner 2023' starts in 2022). If
+	allow_range is not set, the string must contain a single date.
+	Raises a ValueError for strings which are no (valid) dates.
+	"""
+	parts = range_pattern.split(date_string.strip(), maxsplit = 1) if allow_range else [date_string]
+
+	last_day, last_month, last_year = parse_date_parts(parts[-1])
+
+	if last_month is None or last_year is None:
+		raise ValueError('Incomplete date: ' + date_string)
+
+	last_date = to_date(last_year, last_month, last_day, date_string)
+
+	if len(parts) == 1:
+		return last_date.toordinal(), last_date.toordinal()
+
+	first_day, first_month, first_year = parse_date_parts(parts[0])
+
+	if first_month is None:
+		# only the day is given: the range starts in the month of the last
+		# date or, if the day lies after the last date, in the month before
+		# (e.g., '30. bis 2. Jänner 2023' starts on 2022-12-30)
+		if first_day <= last_day:
+			first_date = to_date(last_year, last_month, first_day, date_string)
+		elif last_month == 1:
+			first_date = to_date(last_year - 1, 12, first_day, date_string)
+		else:
+			first_date = to_date(last_year, last_month - 1, first_day, date_string)
+	else:
+		first_date = to_date(
+			first_year if first_year is not None else last_year,
+			first_month, first_day, date_string)
+
+		# the range spans the turn of the year (year of the first date omitted)
+		if first_year is None and first_date > last_date:
+			first_date = first_date.replace(year = first_date.year - 1)
+
+	return first_date.toordinal(), last_date.toordinal()
+
+
+def parse_dates(date_strings, allow_range = True):
+	"""Convert a batch of dates (see parse_date_span()) into day ordinals (first, last).
+
+	Every distinct string is parsed once. Returns the list of
+	(first, last) tuples in the order of the given strings.
+	"""
+	parsed_spans = {}
+
+	for date_string in date_strings:
+		if date_string not in parsed_spans:
+			parsed_spans[date_string] = parse_date_span(date_string, allow_range)
+
+	return [parsed_spans[date_string] for date_string in date_strings]
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+
+"""
+HTTP client for fetching the pages of the sources.
+
+Contrary to urllib.request.urlopen(), the connections are kept alive
+and reused per host (a small, bounded pool per host, so that several
+pages of the same host can be fetched concurrently). Connect and read
+timeouts are applied, transient errors are retried (with exponential
+backoff) and the pages are requested compressed (gzip/deflate).
+"""
+
+import gzip
+import http.client
+import random
+import socket
+import threading
+import time
+import zlib
+
+from urllib.parse import urljoin, urlsplit
+
+# HTTP status codes which are retried (transient server errors, rate limits)
+retry_status_codes = (429, 500, 502, 503, 504)
+
+# HTTP status codes of redirects (followed by the client)
+redirect_status_codes = (301, 302, 303, 307, 308)
+
+# errors which are retried (connection problems, timeouts, invalid responses); other
+# errors (e.g., DNS failures, invalid certificates, corrupt gzip data) are raised at once
+retry_errors = (ConnectionError, socket.timeout, http.client.HTTPException)
+
+# errors of an idle keep-alive connection which has been closed by the server
+# (the request is repeated at once on a fresh connection, without a retry)
+stale_connection_errors = (ConnectionResetError, ConnectionAbortedError, BrokenPipeError,
+	http.client.RemoteDisconnected)
+
+
+class FetchClient:
+	"""Fetch pages via persistent (keep-alive) connections.
+
+	connect_timeout and read_timeout (in seconds) limit the time for
+	establishing a connection and for waiting on data, respectively.
+	Failed requests (see retry_errors and retry_status_codes) are
+	retried up to max_retries times, waiting backoff_base * 2^attempt
+	seconds (plus a random jitter) in between; a delay requested by
+	the server (Retry-After) is respected up to max_retry_after
+	seconds. At most max_connections_per_host connections are open
+	per host (further requests wait for a free one). The client may
+	be used from several threads; close() closes all idle connections.
+	"""
+	def __init__(self, connect_timeout = 10.0, read_timeout = 30.0, max_retries = 3,
+		backoff_base = 0.5, max_redirects = 5, user_agent = 'lecture-free-time-extract',
+		max_retry_after = 60.0, max_connections_per_host = 4):
+
+		self.connect_timeout = connect_timeout
+		self.read_timeout = read_timeout
+		self.max_retries = max_retries
+		self.backoff_base = backoff_base
+		self.max_redirects = max_redirects
+		self.user_agent = user_agent
+		self.max_retry_after = max_retry_after
+		self.max_connections_per_host = max_connections_per_host
+
+		self.lock = threading.Lock()
+		self.idle_connections = {}
+		self.host_slots = {}
+
+	def host_slot(self, scheme, host):
+		"""Return the semaphore bounding the connections (in use) to the host."""
+		with self.lock:
+			if (scheme, host) not in self.host_slots:
+				self.host_slots[(scheme, host)] = threading.BoundedSemaphore(self.max_connections_per_host)
+
+			return self.host_slots[(scheme, host)]
+
+	def acquire_connection(self, scheme, host, reuse = True):
+		"""Return an idle connection to the host or open a new one.
+
+		Waits until less than max_connections_per_host connections
+		to the host are in use. Returns the connection and whether it
+		is a reused (idle) one. Every acquired connection has to be
+		given back via release_connection() or discard_connection().
+		"""
+		if scheme not in ('http', 'https'):
+			raise ValueError('Unsupported URL scheme: ' + scheme)
+
+		slot = self.host_slot(scheme, host)
+		slot.acquire()
+
+		if reuse:
+			with self.lock:
+				idle = self.idle_connections.get((scheme, host))
+				if idle:
+					return idle.pop(), True
+
+		try:
+			if scheme == 'https':
+				connection = http.client.HTTPSConnection(host, timeout = self.connect_timeout)
+			else:
+				connection = http.client.HTTPConnection(host, timeout = self.connect_timeout)
+
+			connection.connect()
+
+			# the connect timeout applies to the handshake only, the read timeout afterwards
+			connection.sock.settimeout(self.read_timeout)
+		except BaseException:
+			slot.release()
+			raise
+
+		return connection, False
+
+	def release_connection(self, scheme, host, connection):
+		"""Put a connection back into the pool (for the next request)."""
+		with self.lock:
+			self.idle_connections.setdefault((scheme, host), []).append(connection)
+
+		self.host_slot(scheme, host).release()
+
+	def discard_connection(self, scheme, host, connection):
+		"""Close a connection which is not reused (see acquire_connection())."""
+		connection.close()
+		self.host_slot(scheme, host).release()
+
+	def close(self):
+		"""Close all idle connections."""
+		with self.lock:
+			idle_connections = self.idle_connections
+			self.idle_connections = {}
+
+		for connections in idle_connections.values():
+			for connection in connections:
+				connection.close()
+
+	def request(self, URL):
+		"""Perform a single GET request (no retries, no redirects).
+
+		Returns the HTTP status, the response headers and the
+		(decompressed) body as well as the amount of transferred
+		(compressed) bytes.
+		"""
+		split_URL = urlsplit(URL)
+		path = split_URL.path or '/'
+		if split_URL.query:
+			path += '?' + split_URL.query
+
+		reuse = True
+
+		while True:
+			connection, reused = self.acquire_connection(split_URL.scheme, split_URL.netloc, reuse)
+
+			try:
+				connection.request('GET', path, headers = {
+					'Accept-Encoding': 'gzip, deflate',
+					'Connection': 'keep-alive',
+					'User-Agent': self.user_agent
+				})
+				response = connection.getresponse()
+				body = response.read()
+			except stale_connection_errors:
+				self.discard_connection(split_URL.scheme, split_URL.netloc, connection)
+
+				# the idle connection has been closed by the server: repeat on a fresh one
+				if reused:
+					reuse = False
+					continue
+				raise
+			except BaseException:
+				self.discard_connection(split_URL.scheme, split_URL.netloc, connection)
+				raise
+
+			break
+
+		if response.will_close:
+			self.discard_connection(split_URL.scheme, split_URL.netloc, connection)
+		else:
+			self.release_connection(split_URL.scheme, split_URL.netloc, connection)
+
+		amount_transferred = len(body)
+		body = decode_content(body, response.getheader('Content-Encoding', ''))
+
+		return response.status, response.headers, body, amount_transferred
+
+	def fetch(self, URL):
+		"""Fetch a page (following redirects, retrying transient errors).
+
+		Returns the HTTP status, the (decompressed) body and the
+		amount of transferred bytes of the final response.
+		"""
+		redirects = 0
+		attempt = 0
+
+		while True:
+			try:
+				status, headers, body, amount_transferred = self.request(URL)
+			except retry_errors:
+				if attempt >= self.max_retries:
+					raise
+				self.backoff(attempt)
+				attempt += 1
+				continue
+
+			if status in redirect_status_codes and headers.get('Location'):
+				if redirects >= self.max_redirects:
+					raise ConnectionError('Too many redirects for URL: ' + URL)
+				URL = urljoin(URL, headers.get('Location'))
+				redirects += 1
+				continue
+
+			if status in retry_status_codes and attempt < self.max_retries:
+				self.backoff(attempt, headers.get('Retry-After'))
+				attempt += 1
+				continue
+
+			return status, body, amount_transferred
+
+	def backoff(self, attempt, retry_after = None):
+		"""Wait before the next attempt (exponential backoff with jitter)."""
+		delay = self.backoff_base * (2 ** attempt)
+
+		# respect the delay requested by the server (if given in seconds), up to max_retry_after
+		if retry_after is not None and retry_after.strip().isdigit():
+			delay = max(delay, min(float(retry_after), self.max_retry_after))
+
+		time.sleep(delay + random.uniform(0, self.backoff_base))
+
+
+def decode_content(body, content_encoding):
+	"""Decompress a response body according to its Content-Encoding."""
+	content_encoding = content_encoding.strip().lower()
+
+	if content_encoding in ('gzip', 'x-gzip'):
+		return gzip.decompress(body)
+
+	if content_encoding == 'deflate':
+		# deflate is sent with (RFC 1950) or without (raw) zlib header
+		try:
+			return zlib.decompress(body)
+		except zlib.error:
+			return zlib.decompress(body, -zlib.MAX_WBITS)
+
+	return body
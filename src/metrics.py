@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+"""
+Timing and counting of the pipeline stages of a single run.
+
+The stages (fetch, decode, cut, extract, merge, DB fetch, existence
+check, insert) are timed via PipelineMetrics.stage() and counts (events
+extracted, duplicates merged, rows inserted, connections opened, ...) are
+recorded via PipelineMetrics.increment(). At the end of a run the results
+are written as a JSON summary and as a Prometheus textfile-collector file.
+"""
+
+import json
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+
+# prefix of all exported (Prometheus) metrics
+metric_prefix = 'lecture_free_times'
+
+
+class PipelineMetrics:
+	"""Collect the stage timings, fetch statistics and counters of a run.
+
+	All functions may be called from several threads (e.g., the
+	concurrent fetches of the sources). Repeated calls of a stage
+	(e.g., one existence check per event) are accumulated, i.e.,
+	the total duration and the amount of calls are stored.
+	"""
+	def __init__(self):
+		self.lock = threading.Lock()
+		self.start_time = time.time()
+		self.stages = {}
+		self.fetches = []
+		self.counters = {}
+
+	@contextmanager
+	def stage(self, name):
+		"""Time the enclosed block and add the duration to the stage 'name'."""
+		t_start = time.perf_counter()
+
+		try:
+			yield
+		finally:
+			self.add_stage_time(name, time.perf_counter() - t_start)
+
+	def add_stage_time(self, name, seconds):
+		"""Add a (measured) duration to the stage 'name'."""
+		with self.lock:
+			stage = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+			stage['seconds'] += seconds
+			stage['calls'] += 1
+
+	def record_fetch(self, URL, seconds, amount_bytes, status):
+		"""Store the statistics of a single fetched URL.
+
+		The duration of the fetch is stored per URL only; the stage
+		'fetch' is timed by the caller (see stage()), so that it is
+		profiled like the other stages (see profiling.py).
+		"""
+		with self.lock:
+			self.fetches.append({
+				'url': URL,
+				'seconds': seconds,
+				'bytes': amount_bytes,
+				'status': status
+			})
+
+		self.increment('bytes_fetched', amount_bytes)
+
+	def increment(self, name, amount = 1):
+		"""Increase the counter 'name' by amount."""
+		with self.lock:
+			self.counters[name] = self.counters.get(name, 0) + amount
+
+	def summary(self):
+		"""Return all collected metrics as a (JSON serializable) dictionary."""
+		with self.lock:
+			return {
+				'start_time': self.start_time,
+				'duration_seconds': time.time() - self.start_time,
+				'stages': {name: dict(stage) for name, stage in self.stages.items()},
+				'fetches': [dict(fetch) for fetch in self.fetches],
+				'counters': dict(self.counters)
+			}
+
+	def write_json(self, path):
+		"""Write the JSON summary of the run to the given path."""
+		write_atomic(path, json.dumps(self.summary(), indent = 4) + '\n')
+
+	def write_prometheus(self, path):
+		"""Write the metrics in the Prometheus text format to the given path.
+
+		The file is intended for the textfile collector of the node
+		exporter and is therefore replaced atomically, i.e., the
+		collector never reads a partially written file.
+		"""
+		summary = self.summary()
+		lines = []
+
+		def add_metric(name, help_text, samples):
+			lines.append('# HELP ' + metric_prefix + '_' + name + ' ' + help_text)
+			lines.append('# TYPE ' + metric_prefix + '_' + name + ' gauge')
+			for labels, value in samples:
+				lines.append(metric_prefix + '_' + name + format_labels(labels) + ' ' + repr(float(value)))
+
+		add_metric('last_run_timestamp_seconds', 'Start time of the last run.',
+			[({}, summary['start_time'])])
+		add_metric('run_duration_seconds', 'Total duration of the last run.',
+			[({}, summary['duration_seconds'])])
+		add_metric('stage_duration_seconds', 'Total duration of the pipeline stages.',
+			[({'stage': name}, stage['seconds']) for name, stage in summary['stages'].items()])
+		add_metric('stage_calls', 'Amount of calls of the pipeline stages.',
+			[({'stage': name}, stage['calls']) for name, stage in summary['stages'].items()])
+		add_metric('fetch_duration_seconds', 'Duration of the fetch of a single URL.',
+			[({'url': fetch['url']}, fetch['seconds']) for fetch in summary['fetches']])
+		add_metric('fetch_bytes', 'Size of the fetched page of a single URL.',
+			[({'url': fetch['url']}, fetch['bytes']) for fetch in summary['fetches']])
+		add_metric('fetch_status', 'HTTP status of the fetch of a single URL.',
+			[({'url': fetch['url']}, fetch['status']) for fetch in summary['fetches']])
+		add_metric('count', 'Counters of the last run (events, rows, connections, ...).',
+			[({'counter': name}, value) for name, value in summary['counters'].items()])
+
+		write_atomic(path, '\n'.join(lines) + '\n')
+
+
+class null_metrics(PipelineMetrics):
+	"""Metrics replacement which discards every measurement.
+
+	Used as the default of the pipeline functions so that they can
+	be called without collecting any metrics.
+	"""
+	def add_stage_time(self, name, seconds):
+		pass
+
+	def record_fetch(self, URL, seconds, amount_bytes, status):
+		pass
+
+	def increment(self, name, amount = 1):
+		pass
+
+
+def format_labels(labels):
+	"""Format the labels (dict) of a Prometheus sample, e.g., {stage="fetch"}."""
+	if not labels:
+		return ''
+
+	def escape(value):
+		return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+	return '{' + ','.join(key + '="' + escape(value) + '"' for key, value in labels.items()) + '}'
+
+
+def write_atomic(path, content):
+	"""Write the content to a temporary file and move it to path afterwards."""
+	tmp_path = path + '.tmp'
+
+	with open(tmp_path, 'w', encoding = 'utf-8') as f:
+		f.write(content)
+
+	os.replace(tmp_path, path)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""
+Profiling of the pipeline stages (--profile mode of the main program).
+
+ProfilingMetrics extends PipelineMetrics (see metrics.py): every timed
+stage is additionally run under cProfile and tracemalloc. At the end of
+the run, one .pstats file per stage and a text report (timings, peak
+memory and the most expensive functions per stage) are written next to
+the general log of the run.
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import tracemalloc
+
+from contextlib import contextmanager
+
+import metrics
+
+# amount of functions listed per stage in the text report
+report_amount_functions = 15
+
+
+class ProfilingMetrics(metrics.PipelineMetrics):
+	"""Pipeline metrics which additionally profile every stage.
+
+	Each stage has its own cProfile.Profile object which is enabled
+	for the duration of the stage (repeated calls are accumulated).
+	The memory peak (tracemalloc) of every stage is stored as well.
+	Nested stages are only profiled by the outermost stage. Note
+	that cProfile only profiles the thread which enabled it, hence
+	the profiled stages should run sequentially.
+	"""
+	def __init__(self):
+		super().__init__()
+		self.profiles = {}
+		self.memory_peaks = {}
+		self.active = threading.local()
+
+		if not tracemalloc.is_tracing():
+			tracemalloc.start()
+
+	@contextmanager
+	def stage(self, name):
+		"""Time, profile and trace the memory of the enclosed block (stage 'name')."""
+		if getattr(self.active, 'stage', None) is not None:
+			with super().stage(name):
+				yield
+			return
+
+		with self.lock:
+			profile = self.profiles.setdefault(name, cProfile.Profile())
+
+		self.active.stage = name
+		tracemalloc.reset_peak()
+		memory_start = tracemalloc.get_traced_memory()[0]
+
+		try:
+			with super().stage(name):
+				profile.enable()
+				try:
+					yield
+				finally:
+					profile.disable()
+		finally:
+			memory_peak = tracemalloc.get_traced_memory()[1] - memory_start
+			self.active.stage = None
+
+			with self.lock:
+				self.memory_peaks[name] = max(self.memory_peaks.get(name, 0), memory_peak)
+
+	def write_reports(self, log_prefix):
+		"""Write the .pstats files and the text report of all stages.
+
+		The files are named after the given prefix (path and
+		datestring of the run), e.g., 'logs/YYYY-MM-DD_HH:MM:SS
+		profile_extract.pstats' and 'logs/YYYY-MM-DD_HH:MM:SS
+		profile_report.txt'. Returns the paths of the written files.
+		"""
+		summary = self.summary()
+		written_files = []
+		report = io.StringIO()
+
+		report.write('profile report (stage | calls | total time [s] | peak memory [KiB])\n\n')
+
+		for name, stage in summary['stages'].items():
+			report.write(name + ' | ' + str(stage['calls']) + ' | ' + '%.6f' % stage['seconds'] +
+				' | ' + '%.1f' % (self.memory_peaks.get(name, 0) / 1024.0) + '\n')
+
+		for name, profile in self.profiles.items():
+			pstats_path = log_prefix + ' profile_' + name + '.pstats'
+			profile.dump_stats(pstats_path)
+			written_files.append(pstats_path)
+
+			report.write('\n\n## stage: ' + name + ' (sorted by cumulative time)\n')
+			stats = pstats.Stats(profile, stream = report)
+			stats.sort_stats('cumulative').print_stats(report_amount_functions)
+
+		report_path = log_prefix + ' profile_report.txt'
+		metrics.write_atomic(report_path, report.getvalue())
+		written_files.append(report_path)
+
+		return written_files
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+
+"""
+Progress reporting of long-running table transfers (import/export).
+
+A ProgressReporter is updated with the processed rows and bytes and the
+latency of every batch (e.g., an INSERT or a fetched block of rows). In
+regular intervals (and at the end of the job) the throughput (rows/s,
+bytes/s), the percentiles of the recent batch latencies and the estimated
+remaining time (based on the total bytes, e.g., the size of the imported
+file, or the total rows, e.g., COUNT(*) of the exported table) are written
+to the log and to a machine-readable status file (JSON).
+"""
+
+import json
+import time
+
+from collections import deque
+
+import metrics
+import pylogs
+
+# amount of (recent) batch latencies used for the percentiles
+latency_window = 10000
+
+# reported percentiles of the batch latencies
+latency_percentiles = (50, 90, 99)
+
+
+class ProgressReporter:
+	"""Collect and report the progress of a single job (e.g., 'import <table>').
+
+	total_rows and total_bytes (if known) are used for the percentage
+	and the estimated remaining time (ETA); the bytes are preferred.
+	The progress is reported every report_interval seconds via
+	log.append_to_log() and written to status_path (if given).
+	"""
+	def __init__(self, job, total_rows = None, total_bytes = None, log = None,
+		status_path = None, report_interval = 5.0):
+
+		self.job = job
+		self.total_rows = total_rows
+		self.total_bytes = total_bytes
+		self.log = log if log is not None else pylogs.null_logs()
+		self.status_path = status_path
+		self.report_interval = report_interval
+
+		self.start_time = time.time()
+		self.t_start = time.perf_counter()
+		self.t_last_report = self.t_start
+		self.rows = 0
+		self.amount_bytes = 0
+		self.batches = 0
+		self.batch_latencies = deque(maxlen = latency_window)
+		self.state = 'running'
+
+	def set_totals(self, total_rows = None, total_bytes = None):
+		"""Set the total rows/bytes of the job (once they are known)."""
+		if total_rows is not None:
+			self.total_rows = total_rows
+		if total_bytes is not None:
+			self.total_bytes = total_bytes
+
+	def update(self, rows = 0, amount_bytes = 0, batch_seconds = None):
+		"""Add processed rows/bytes (and the latency of a processed batch)."""
+		self.rows += rows
+		self.amount_bytes += amount_bytes
+
+		if batch_seconds is not None:
+			self.batches += 1
+			self.batch_latencies.append(batch_seconds)
+
+		t_now = time.perf_counter()
+
+		if t_now - self.t_last_report >= self.report_interval:
+			self.t_last_report = t_now
+			self.report()
+
+	def finish(self, state = 'finished'):
+		"""Report the final state of the job ('finished' or 'failed')."""
+		self.state = state
+		self.report()
+
+	def status(self):
+		"""Return the current progress as (JSON serializable) dictionary."""
+		elapsed_seconds = time.perf_counter() - self.t_start
+
+		status = {
+			'job': self.job,
+			'state': self.state,
+			'start_time': self.start_time,
+			'update_time': time.time(),
+			'elapsed_seconds': elapsed_seconds,
+			'rows': self.rows,
+			'total_rows': self.total_rows,
+			'bytes': self.amount_bytes,
+			'total_bytes': self.total_bytes,
+			'rows_per_second': self.rows / elapsed_seconds if elapsed_seconds > 0 else None,
+			'bytes_per_second': self.amount_bytes / elapsed_seconds if elapsed_seconds > 0 else None,
+			'batches': self.batches,
+			'batch_latency_ms': latency_summary(self.batch_latencies),
+			'percent': None,
+			'eta_seconds': None
+		}
+
+		# fraction of the job done (bytes preferred, e.g., of the imported file)
+		if self.total_bytes:
+			done = min(self.amount_bytes / self.total_bytes, 1.0)
+		elif self.total_rows:
+			done = min(self.rows / self.total_rows, 1.0)
+		else:
+			done = None
+
+		if done is not None:
+			status['percent'] = 100.0 * done
+
+			if self.state != 'running':
+				status['eta_seconds'] = 0.0
+			elif done > 0:
+				status['eta_seconds'] = elapsed_seconds * (1.0 - done) / done
+
+		return status
+
+	def report(self):
+		"""Write the current progress to the log and to the status file."""
+		status = self.status()
+
+		self.log.append_to_log(format_status(status))
+
+		if self.status_path is not None:
+			metrics.write_atomic(self.status_path, json.dumps(status, indent = 4) + '\n')
+
+
+class null_progress(ProgressReporter):
+	"""Progress replacement which discards every update.
+
+	Used as the default of the transfer functions (see sqlhandler.py).
+	"""
+	def __init__(self, job = ''):
+		super().__init__(job)
+
+	def update(self, rows = 0, amount_bytes = 0, batch_seconds = None):
+		pass
+
+	def report(self):
+		pass
+
+
+def latency_summary(batch_latencies):
+	"""Return the percentiles and the maximum of the batch latencies (in ms)."""
+	if not batch_latencies:
+		return None
+
+	sorted_latencies = sorted(batch_latencies)
+	summary = {}
+
+	for percentile in latency_percentiles:
+		position = min(int(len(sorted_latencies) * percentile / 100.0), len(sorted_latencies) - 1)
+		summary['p' + str(percentile)] = sorted_latencies[position] * 1000.0
+
+	summary['max'] = sorted_latencies[-1] * 1000.0
+
+	return summary
+
+
+def format_status(status):
+	"""Format the progress (see ProgressReporter.status()) as single log line."""
+	line = (status['job'] + ' [' + status['state'] + ']: ' + str(status['rows']) + ' rows')
+
+	if status['total_rows']:
+		line += ' of ' + str(status['total_rows'])
+
+	line += ', ' + '%.1f' % (status['bytes'] / 1048576.0) + ' MiB'
+
+	if status['total_bytes']:
+		line += ' of ' + '%.1f' % (status['total_bytes'] / 1048576.0) + ' MiB'
+
+	if status['rows_per_second'] is not None:
+		line += ', ' + '%.1f' % status['rows_per_second'] + ' rows/s'
+
+	if status['batch_latency_ms'] is not None:
+		line += ', batch latency ' + '/'.join(
+			'p' + str(percentile) + ' ' + '%.1f' % status['batch_latency_ms']['p' + str(percentile)]
+			for percentile in latency_percentiles) + ' ms'
+
+	if status['percent'] is not None:
+		line += ', ' + '%.1f' % status['percent'] + ' %'
+
+	if status['eta_seconds'] is not None:
+		line += ', ETA ' + '%.0f' % status['eta_seconds'] + ' s'
+
+	return line
@@ -1,5 +1,7 @@
 #!/usr/bin/python3
 
+import threading
+
 from datetime import datetime
 
 class logs:
@@ -21,10 +23,16 @@ class logs:
 		else:
 			spacing = ''
 
+		# prefix of the logfile (path and datestring), e.g., for related output files
+		self.log_prefix = logpath + date_logfile
+
 		# create the filestream
 		f = open(logpath + date_logfile + spacing + filename + ".txt", "a")
 		self.log_file = f
 
+		# the logs may be written from several threads (concurrent fetches)
+		self.lock = threading.Lock()
+
 	def append_to_log(self, msg):
 		"""Push a message to the logfile.
 
@@ -43,8 +51,9 @@ class logs:
 		dt_string = now.strftime("%Y-%m-%d %H:%M:%S")
 
 		# write the message the the file and flush the cache
-		self.log_file.write(dt_string + " >> " + msg + "\n")
-		self.log_file.flush()
+		with self.lock:
+			self.log_file.write(dt_string + " >> " + msg + "\n")
+			self.log_file.flush()
 
 	def dump_to_log(self, msg, header = ''):
 		"""Dump a textblob into the logfile.
@@ -64,5 +73,23 @@ class logs:
 		dt_string = now.strftime("%Y-%m-%d %H:%M:%S")
 
 		# write the message the the file and flush the cache
-		self.log_file.write(dt_string + " >> " + header + "\n\n" + msg)
-		self.log_file.flush()
+		with self.lock:
+			self.log_file.write(dt_string + " >> " + header + "\n\n" + msg)
+			self.log_file.flush()
+
+
+class null_logs(logs):
+	"""Logfile replacement which discards every message.
+
+	Used as the default logger of the extraction functions so
+	that they can be imported and called (e.g., for testing or
+	reuse) without creating any files in the logging path.
+	"""
+	def __init__(self, logpath = '', filename = ''):
+		self.log_file = None
+
+	def append_to_log(self, msg):
+		pass
+
+	def dump_to_log(self, msg, header = ''):
+		pass
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+"""
+Offline replay of the archived page snapshots (regression runs of the extractors).
+
+Every run of the main program dumps the fetched pages into logs/, e.g.,
+'logs/YYYY-MM-DD_HH:MM:SS statutory_source.txt' or (one file per
+academic year) 'logs/YYYY-MM-DD_HH:MM:SS academic_calendar_source_2022.txt'.
+This script feeds all
+archived snapshots through the extraction engine (see sources.py) on a
+process pool and compares the extracted events against the stored golden
+results (logs/golden/). Differences and the timing of every snapshot are
+reported; no network access is needed.
+
+Usage: python3 src/replay_snapshots.py [--logs logs/] [--update-golden]
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import sys
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import sources
+
+# amount of differences listed per snapshot
+report_amount_differences = 10
+
+
+def snapshot_log_name(snapshot_path):
+	"""Return the log name and the year (None: no year) of a snapshot (via its filename)."""
+	log_name = os.path.basename(snapshot_path)[:-len('.txt')].split(' ', 1)[-1]
+
+	base_name, separator, year = log_name.rpartition('_')
+
+	if separator and len(year) == 4 and year.isdigit():
+		return base_name, int(year)
+
+	return log_name, None
+
+
+def snapshot_source(snapshot_path):
+	"""Return the source spec of a snapshot (via the log name in its filename)."""
+	log_name, year = snapshot_log_name(snapshot_path)
+
+	for spec in sources.registered_sources():
+		if spec.log_name == log_name:
+			return spec
+
+	return None
+
+
+def load_snapshot(snapshot_path):
+	"""Load the (raw) page source (bytes) of an archived snapshot.
+
+	The snapshot consists of a header line, an empty line and the
+	string representation of the fetched bytes (b'...').
+	"""
+	with open(snapshot_path, encoding = 'utf-8') as fp:
+		snapshot_content = fp.read()
+
+	return ast.literal_eval(snapshot_content.split('\n\n', 1)[1])
+
+
+def detect_year(spec, source_of_URL):
+	"""Return the year whose cut markers are found in the page (None: default markers)."""
+	source_str_data = str(source_of_URL, spec.encoding, 'replace')
+
+	for year in [None] + sorted(spec.cut_markers_by_year):
+		cut_start, cut_end = spec.cut_markers(year)
+		if cut_start in source_str_data:
+			return year
+
+	return None
+
+
+def golden_path(golden_dir, snapshot_path):
+	"""Return the path of the golden result of a snapshot."""
+	return os.path.join(golden_dir, os.path.basename(snapshot_path)[:-len('.txt')] + '.json')
+
+
+def replay_snapshot(snapshot_path):
+	"""Extract the events of a single snapshot (run in a worker process).
+
+	Returns a dictionary containing the snapshot path, the extracted
+	events (list of [date, description]), the extraction time and
+	the error (if any).
+	"""
+	result = {'snapshot': snapshot_path, 'events': None, 'seconds': 0.0, 'error': None}
+
+	spec = snapshot_source(snapshot_path)
+	if spec is None:
+		result['error'] = 'no registered source for this snapshot'
+		return result
+
+	try:
+		source_of_URL = load_snapshot(snapshot_path)
+
+		# the year is part of the filename of newer snapshots
+		log_name, year = snapshot_log_name(snapshot_path)
+		if year is None:
+			year = detect_year(spec, source_of_URL)
+
+		t_start = time.perf_counter()
+		return_events = sources.extract_events(spec, source_of_URL, year = year)
+		result['seconds'] = time.perf_counter() - t_start
+
+		result['events'] = [list(event) for event in return_events]
+	except Exception as error:
+		result['error'] = type(error).__name__ + ': ' + str(error)
+
+	return result
+
+
+def compare_events(golden_events, events):
+	"""Return the differences (strings) between the golden and the extracted events."""
+	return_differences = []
+
+	if golden_events == events:
+		return return_differences
+
+	golden_set = {tuple(event) for event in golden_events}
+	events_set = {tuple(event) for event in events}
+
+	for event_date, event_descr in sorted(golden_set - events_set):
+		return_differences.append('- ' + event_date + ' | ' + event_descr)
+
+	for event_date, event_descr in sorted(events_set - golden_set):
+		return_differences.append('+ ' + event_date + ' | ' + event_descr)
+
+	if not return_differences:
+		return_differences.append('  same events, different order/count (' +
+			str(len(golden_events)) + ' golden, ' + str(len(events)) + ' extracted)')
+
+	return return_differences
+
+
+def main(argv = None):
+	parser = argparse.ArgumentParser(description = 'Replay the archived page snapshots '
+		'through the extractors and compare the results against the golden results.')
+	parser.add_argument('--logs', default = 'logs/', help = 'folder of the snapshots (default: %(default)s)')
+	parser.add_argument('--golden', default = None, help = 'folder of the golden results (default: <logs>/golden/)')
+	parser.add_argument('--update-golden', action = 'store_true',
+		help = 'store the extracted events as (new) golden results')
+	parser.add_argument('--workers', type = int, default = None, help = 'amount of worker processes')
+	arguments = parser.parse_args(argv)
+
+	golden_dir = arguments.golden or os.path.join(arguments.logs, 'golden')
+
+	# the logs of pages which could not be fetched (e.g., skipped years) are empty
+	snapshot_paths = sorted(
+		path for path in glob.glob(os.path.join(arguments.logs, '*source*.txt'))
+		if snapshot_source(path) is not None and os.path.getsize(path) > 0
+	)
+
+	t_start = time.perf_counter()
+
+	with ProcessPoolExecutor(max_workers = arguments.workers) as executor:
+		results = list(executor.map(replay_snapshot, snapshot_paths))
+
+	t_total = time.perf_counter() - t_start
+	amount_failed = 0
+
+	if arguments.update_golden:
+		os.makedirs(golden_dir, exist_ok = True)
+
+	for result in results:
+		snapshot_name = os.path.basename(result['snapshot'])
+		timing = '%8.2f ms' % (result['seconds'] * 1000.0)
+
+		if result['error'] is not None:
+			print('ERROR ' + timing + ' ' + snapshot_name + ': ' + result['error'])
+			amount_failed += 1
+			continue
+
+		path = golden_path(golden_dir, result['snapshot'])
+
+		if arguments.update_golden:
+			# one event per line (readable diffs of the golden results)
+			with open(path, 'w', encoding = 'utf-8') as fp:
+				fp.write('[\n' + ',\n'.join(json.dumps(event, ensure_ascii = False) for event in result['events']) + '\n]\n')
+			print('SAVED ' + timing + ' ' + snapshot_name + ' (' + str(len(result['events'])) + ' events)')
+			continue
+
+		if not os.path.isfile(path):
+			print('NEW   ' + timing + ' ' + snapshot_name + ' (' + str(len(result['events'])) + ' events, no golden result)')
+			continue
+
+		with open(path, encoding = 'utf-8') as fp:
+			golden_events = json.load(fp)
+
+		differences = compare_events(golden_events, result['events'])
+
+		if differences:
+			print('DIFF  ' + timing + ' ' + snapshot_name + ' (' + str(len(differences)) + ' differences)')
+			for difference in differences[:report_amount_differences]:
+				print('      ' + difference)
+			amount_failed += 1
+		else:
+			print('OK    ' + timing + ' ' + snapshot_name + ' (' + str(len(result['events'])) + ' events)')
+
+	print('\nreplayed ' + str(len(results)) + ' snapshots in ' + '%.2f' % t_total + ' s, ' +
+		str(amount_failed) + ' failed')
+
+	return 1 if amount_failed else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
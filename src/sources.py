@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+
+"""
+Registry of the crawled sources (pages containing lecture-free times).
+
+Every source is described declaratively by a SourceSpec (URL template,
+encoding, cut markers, item delimiters and date grammar) and processed
+by the shared extraction engine extract_events(). All registered sources
+(and years) are fetched and extracted concurrently via run_sources().
+"""
+
+import datetime
+
+import events
+import german_dates
+import metrics
+import pylogs
+
+# default (discarding) logger and metrics used when none are given
+_null_log = pylogs.null_logs()
+_null_metrics = metrics.null_metrics()
+
+# date grammars: 'single' (one date per event) or 'range' (single dates
+# and ranges, e.g., 'Freitag, 23. Dezember 2022 bis Samstag, 07. Jänner 2023'),
+# parsed via german_dates.py
+date_grammars = ('single', 'range')
+
+# first day (month, day) of an academic year
+academic_year_start = (10, 1)
+
+
+def current_academic_year(today = None):
+	"""Return the (first) year of the academic year of the given day (default: today).
+
+	The academic year YYYY starts on the 1st of October of YYYY, e.g.,
+	the 15th of May 2026 belongs to the academic year 2025-26.
+	"""
+	if today is None:
+		today = datetime.date.today()
+
+	if (today.month, today.day) >= academic_year_start:
+		return today.year
+
+	return today.year - 1
+
+
+class SourceSpec:
+	"""Declarative description of a single source (page) to be crawled.
+
+	The URL may contain the placeholders {year}, {next_year} and
+	{next_year_short} (e.g., 'studienjahr-{year}-{next_year_short}'),
+	which are filled in for every year that is requested. The source
+	string is decoded using 'encoding' and cut between the (unique)
+	markers cut_start and cut_end. Each event is enclosed between
+	item_start and item_end; the description and the date of an event
+	are separated by item_divider. The first skip_entries items are
+	skipped and the processing stops once the remaining string is
+	shorter than min_remaining characters. Additional replacements
+	(e.g., removing '&nbsp;') are applied to the cut string. Pages of
+	different years may use different cut markers, which are given via
+	cut_markers_by_year (year -> (cut_start, cut_end)), and may be
+	located at different URLs, which are given via url_templates_by_year
+	(year -> URL template). If no
+	default_years are given, the current academic year is fetched
+	(see current_academic_year()).
+	"""
+	def __init__(self, name, url_template, encoding, cut_start, cut_end,
+		item_start, item_end, item_divider = ':', date_grammar = 'single',
+		skip_entries = 0, min_remaining = 100, replacements = (),
+		default_years = None, log_name = None, cut_markers_by_year = None,
+		url_templates_by_year = None):
+
+		if date_grammar not in date_grammars:
+			raise ValueError('Unknown date grammar: ' + str(date_grammar))
+
+		self.name = name
+		self.url_template = url_template
+		self.encoding = encoding
+		self.cut_start = cut_start
+		self.cut_end = cut_end
+		self.item_start = item_start
+		self.item_end = item_end
+		self.item_divider = item_divider
+		self.date_grammar = date_grammar
+		self.skip_entries = skip_entries
+		self.min_remaining = min_remaining
+		self.replacements = tuple(replacements)
+		self.default_years = tuple(default_years) if default_years is not None else None
+		self.log_name = log_name if log_name is not None else name
+		self.cut_markers_by_year = dict(cut_markers_by_year or {})
+		self.url_templates_by_year = dict(url_templates_by_year or {})
+
+	def url(self, year = None):
+		"""Return the URL of this source for the given (academic) year."""
+		if year is None:
+			return self.url_template
+
+		return self.url_templates_by_year.get(year, self.url_template).format(
+			year = year,
+			next_year = year + 1,
+			next_year_short = '%02d' % ((year + 1) % 100,))
+
+	def job_log_name(self, year = None):
+		"""Return the name of the logfile of the page of the given year.
+
+		Every (spec, year) job is dumped into its own logfile, e.g.,
+		'academic_calendar_source_2022' (see replay_snapshots.py).
+		"""
+		if year is None:
+			return self.log_name
+
+		return self.log_name + '_' + str(year)
+
+	def cut_markers(self, year = None):
+		"""Return the two cut markers (start, end) for the given year."""
+		return self.cut_markers_by_year.get(year, (self.cut_start, self.cut_end))
+
+
+# all registered sources (by name, in the order of registration)
+source_registry = {}
+
+
+def register_source(spec):
+	"""Add a source (SourceSpec) to the registry and return it."""
+	if spec.name in source_registry:
+		raise ValueError('Source already registered: ' + spec.name)
+
+	source_registry[spec.name] = spec
+
+	return spec
+
+
+def get_source(name):
+	"""Return the registered source with the given name."""
+	if name not in source_registry:
+		raise KeyError('Unknown source: ' + name)
+
+	return source_registry[name]
+
+
+def registered_sources():
+	"""Return a list of all registered sources (in registration order)."""
+	return list(source_registry.values())
+
+
+def extract_events(spec, source_of_URL, general_log = _null_log, source_cut_log = _null_log, year = None,
+	metrics = _null_metrics):
+	"""Extract the events of a fetched page as described by the source spec.
+
+	The page source (bytes) is decoded, cut at the markers of the
+	spec and the events (description, date) are extracted between the
+	item delimiters. The dates of all events are parsed in one batch
+	(see german_dates.parse_dates()) and ranged events are expanded
+	into single days. The
+	(optional) year selects year specific cut markers; a ValueError is
+	raised if a marker is not found on the page. The stages (decode,
+	cut, extract) are timed via metrics. The events are returned as
+	event list (see events.EventList).
+	"""
+
+	general_log.append_to_log("starting extraction: " + spec.name)
+
+	# change the fetched data from byte to str
+	with metrics.stage('decode'):
+		source_str_data = str(source_of_URL, spec.encoding)
+
+	# cut the string to contain only the relevant information
+	with metrics.stage('cut'):
+		cut_start, cut_end = spec.cut_markers(year)
+		cut_pos1 = source_str_data.find(cut_start)
+
+		# the page (e.g., of another year) is laid out differently
+		if cut_pos1 == -1:
+			raise ValueError('Cut marker not found (' + spec.name + ', year ' + str(year) + '): ' + cut_start)
+
+		cut_pos2 = source_str_data.find(cut_end, cut_pos1)
+
+		if cut_pos2 == -1:
+			raise ValueError('Cut marker not found (' + spec.name + ', year ' + str(year) + '): ' + cut_end)
+
+		cut_string = source_str_data[cut_pos1:cut_pos2]
+
+		for replace_old, replace_new in spec.replacements:
+			cut_string = cut_string.replace(replace_old, replace_new)
+
+	general_log.append_to_log("cut position1: " + cut_start)
+	general_log.append_to_log("cut position2: " + cut_end)
+	general_log.append_to_log("search string1: " + spec.item_start)
+	general_log.append_to_log("search string2: " + spec.item_end)
+
+	source_cut_log.dump_to_log(cut_string, "extracted part of the page source from which the events (dates, descriptions) will be extracted")
+
+	with metrics.stage('extract'):
+		skip_pos = 0
+
+		# (description, date) of the events (the dates are parsed in one batch)
+		event_descriptions = []
+		event_dates_raw = []
+
+		# process the string until the (source specific) length of it is reached
+		while len(cut_string) > spec.min_remaining:
+			cut_pos3 = cut_string.find(spec.item_start)
+			cut_pos4 = cut_string.find(spec.item_end)
+
+			# no (complete) event left in the remaining string
+			if cut_pos3 == -1 or cut_pos4 == -1:
+				break
+
+			if skip_pos >= spec.skip_entries:
+				# extract the event description and the date(s)
+				event_extract = cut_string[cut_pos3 + len(spec.item_start):cut_pos4]
+				pos_event_divider = event_extract.find(spec.item_divider)
+				event_descriptions.append(event_extract[:pos_event_divider])
+				event_dates_raw.append(event_extract[pos_event_divider + len(spec.item_divider):].strip())
+
+			skip_pos += 1
+
+			# remove the found information (and redo the search)
+			cut_string = cut_string[cut_pos4 + len(spec.item_end):]
+
+		date_spans = german_dates.parse_dates(event_dates_raw, spec.date_grammar == 'range')
+
+		return_events = events.EventList()
+
+		for event_description, (first_ordinal, last_ordinal) in zip(event_descriptions, date_spans):
+			if first_ordinal == last_ordinal:
+				return_events.append(first_ordinal, event_description)
+			else:
+				# populate ranged events, e.g., semester breaks
+				return_events.append_range(first_ordinal, last_ordinal, event_description)
+
+	metrics.increment('events_extracted', len(return_events))
+
+	general_log.append_to_log("amount of events found: " + str(len(return_events)))
+
+	return return_events
+
+
+def source_jobs(specs = None, years = None):
+	"""Return the (spec, year) combinations to be fetched.
+
+	If no years are given, the default years of each spec (or the
+	current academic year) are used. Sources without a year placeholder in their URL are
+	fetched only once.
+	"""
+	if specs is None:
+		specs = registered_sources()
+
+	jobs = []
+
+	for spec in specs:
+		if '{' not in spec.url_template:
+			spec_years = (None,)
+		elif years is not None:
+			spec_years = years
+		elif spec.default_years is not None:
+			spec_years = spec.default_years
+		else:
+			spec_years = (current_academic_year(),)
+
+		for year in spec_years:
+			jobs.append((spec, year))
+
+	return jobs
+
+
+def run_sources(jobs, fetch, general_log = _null_log, open_log = None, max_workers = 16,
+	metrics = _null_metrics, raise_errors = True, optional_sources = ()):
+	"""Fetch and extract all given (spec, year) jobs concurrently.
+
+	The function fetch(URL) returns the page source (bytes). The
+	optional function open_log(filename) returns a logfile for the
+	raw and the cut page sources of each job (see
+	SourceSpec.job_log_name()). The extraction
+	stages are timed via metrics. Returns a list of (spec, year,
+	events) in the order of the given jobs. A job fails if its page
+	cannot be fetched, if a cut marker is missing or if no events are
+	extracted. If raise_errors is not set, failed jobs (e.g., a page
+	which does not exist for a certain year) are logged, counted
+	(sources_failed) and omitted from the returned list instead of
+	raising the error. Failed jobs of the optional_sources (names of
+	sources which are not needed for the sync, e.g., fetched for a
+	cross-check only) are always skipped.
+	"""
+	from concurrent.futures import ThreadPoolExecutor
+
+	source_logs = {}
+
+	# create the logfiles up front (in this thread)
+	for spec, year in jobs:
+		log_name = spec.job_log_name(year)
+
+		if log_name in source_logs:
+			continue
+
+		if open_log is None:
+			source_logs[log_name] = (_null_log, _null_log)
+		else:
+			source_logs[log_name] = (open_log(log_name), open_log(log_name + '_cut'))
+
+	def run_job(spec, year):
+		source_log, source_cut_log = source_logs[spec.job_log_name(year)]
+
+		URL = spec.url(year)
+		general_log.append_to_log(spec.name + " URL: " + URL)
+
+		source_of_URL = fetch(URL)
+		source_log.dump_to_log(str(source_of_URL), "raw fetched page (" + spec.name + ") which will be processed")
+
+		metrics.increment('sources_fetched')
+
+		job_events = extract_events(spec, source_of_URL, general_log, source_cut_log, year, metrics)
+
+		# a page without events is most likely laid out differently (not an empty year)
+		if len(job_events) == 0:
+			raise ValueError('No events extracted (' + spec.name + ', year ' + str(year) + '): ' + URL)
+
+		return job_events
+
+	if not jobs:
+		return []
+
+	with ThreadPoolExecutor(max_workers = min(max_workers, len(jobs))) as executor:
+		futures = [executor.submit(run_job, spec, year) for spec, year in jobs]
+
+		return_results = []
+
+		for (spec, year), future in zip(jobs, futures):
+			try:
+				return_results.append((spec, year, future.result()))
+			except Exception as error:
+				if raise_errors and spec.name not in optional_sources:
+					raise
+
+				general_log.append_to_log("skipping " + spec.name + " (" + spec.url(year) + "): " + type(error).__name__ + ": " + str(error))
+				metrics.increment('sources_failed')
+
+		return return_results
+
+
+## registered sources ##
+
+register_source(SourceSpec(
+	name = 'tuwien_academic_calendar',
+	url_template = 'https://www.tuwien.at/studium/zulassung/akademischer-kalender/studienjahr-{year}-{next_year_short}',
+	encoding = 'utf-8',
+	cut_start = 'aria-labelledby="c426624Heading140154">',
+	cut_end = 'wpGeneralContentElement wpContentElementText wpGeneralTextStyling',
+	item_start = '<li>',
+	item_end = '</li>',
+	item_divider = ':',
+	date_grammar = 'range',
+	min_remaining = 0,
+	# remove whitespaces (&nbsp;) and the emphasis of the descriptions (<strong>)
+	replacements = (('&nbsp; ', ''), ('&nbsp;', ''), ('<strong>', ''), ('</strong>', '')),
+	log_name = 'academic_calendar_source',
+	cut_markers_by_year = {
+		2021: ('aria-labelledby="c426552Heading140139">', '<!--TYPO3SEARCH_end-->')
+	},
+	# the page of 2021-22 was located outside of 'zulassung'
+	url_templates_by_year = {
+		2021: 'https://www.tuwien.at/studium/akademischer-kalender/studienjahr-{year}-{next_year_short}'
+	}
+))
+
+register_source(SourceSpec(
+	name = 'wien_statutory_holidays',
+	url_template = 'https://www.wien.gv.at/amtshelfer/feiertage/',
+	encoding = 'latin-1',
+	cut_start = 'editableDocument',
+	cut_end = 'bde-stx-wrapper',
+	item_start = '<li><span>',
+	item_end = '</span>',
+	item_divider = ': ',
+	date_grammar = 'single',
+	# the first entries are the links to the years (2022, 2023, ...)
+	skip_entries = 3,
+	min_remaining = 100,
+	log_name = 'statutory_source'
+))
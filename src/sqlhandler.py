@@ -1,20 +1,237 @@
 # -*- coding: utf-8 -*-
 #!/usr/bin/python3
 
-import mysql.connector as database
-
+import csv
+import datetime
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import time
+import types
+
+from collections import OrderedDict
 from pathlib import Path
 
-# load sql login credentials from an external file
-my_file = Path("src/config.py")
+import progress as transfer_progress
+
+# default path of the config file (next to this module, independent of the working directory)
+default_config_path = Path(__file__).resolve().parent / "config.py"
+
+def load_config(path = None, allow_missing = False):
+	"""Load the login credentials and DB endpoints from a config file.
+
+	The file (see config_example.py) is loaded explicitly from the
+	given path (default: config.py next to this module) and returned
+	as a module object. If the file does not exist, a
+	FileNotFoundError is raised; only with allow_missing (e.g., for
+	the tests in the github CI), an object with empty default
+	credentials is returned instead.
+	"""
+	config_file = Path(path) if path is not None else default_config_path
+
+	if not config_file.is_file():
+		if not allow_missing:
+			raise FileNotFoundError("No config file found: " + str(config_file) +
+				" (rename and configure config_example.py)")
+
+		return types.SimpleNamespace(
+			dbLoginUser = "",
+			dbLoginPassword = "",
+			dbHostURL = "",
+			dbDatabase = "",
+			dbCalendarTable = "")
+
+	spec = importlib.util.spec_from_file_location("config", config_file)
+	config = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(config)
+
+	return config
+
+# managed layout of the calendar table (see SqlHandler.create_calendar_table())
+calendar_columns = [
+	"`date` date NOT NULL",
+	"`vorlesungsfrei` tinyint(1) NOT NULL DEFAULT 1",
+	"`shortinfo` varchar(255) NOT NULL",
+	"`longinfo` text NOT NULL",
+	"`location` varchar(255) NOT NULL",
+	"`piclink` varchar(255) NOT NULL",
+	"`event` tinyint(1) NOT NULL DEFAULT 0"
+]
+
+# indexes of the calendar table: (name, unique, columns)
+# (the unique key on the date makes the upserts of the events correct)
+calendar_indexes = [
+	('uq_calendar_date', True, ('date',)),
+	('idx_calendar_vorlesungsfrei', False, ('vorlesungsfrei', 'date'))
+]
+
+def index_definition(index_name, unique, columns):
+	"""Return the definition of an index, e.g., "UNIQUE KEY `uq_calendar_date` (`date`)"."""
+	return (('UNIQUE KEY `' if unique else 'KEY `') + index_name + '` (' +
+		', '.join('`' + column + '`' for column in columns) + ')')
+
+def academic_year_partitions(years):
+	"""Return the (RANGE) partition definitions of the given academic years.
+
+	The academic year YYYY starts on the 1st of October, i.e., the
+	partition pYYYY holds all dates before the 1st of October of
+	the following year (the first partition also holds all older
+	dates). The partition pmax holds all dates after the last year.
+	"""
+	return_partitions = []
+
+	for year in sorted(set(years)):
+		return_partitions.append("PARTITION p" + str(year) +
+			" VALUES LESS THAN (TO_DAYS('" + str(year + 1) + "-10-01'))")
+
+	return_partitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+
+	return return_partitions
+
+# errors of LOAD DATA LOCAL INFILE if the server/client disallows local files
+# (ER_NOT_ALLOWED_COMMAND, CR_LOAD_DATA_LOCAL_INFILE_REJECTED, ER_CLIENT_LOCAL_FILES_DISABLED)
+local_infile_errors = (1148, 2068, 3948)
+
+def escape_infile_field(value):
+	"""Escape a value for a staged file of LOAD DATA INFILE (tab separated, NULL: \\N)."""
+	if value is None:
+		return '\\N'
+
+	return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+		.replace('\n', '\\n').replace('\r', '\\r').replace('\0', '\\0'))
+
+def unescape_infile_field(field):
+	"""Reverse escape_infile_field() (used by the fallback of the bulk import)."""
+	if field == '\\N':
+		return None
+
+	if '\\' not in field:
+		return field
 
-# default ones for the tests (github CI).
-dbLoginUser = ""
-dbLoginPassword = ""
-dbHostURL = ""
+	replacements = {'t': '\t', 'n': '\n', 'r': '\r', '0': '\0'}
+	return_chars = []
+	i = 0
 
-if my_file.is_file():
-	from config import *
+	while i < len(field):
+		if field[i] == '\\' and i + 1 < len(field):
+			return_chars.append(replacements.get(field[i+1], field[i+1]))
+			i += 2
+		else:
+			return_chars.append(field[i])
+			i += 1
+
+	return ''.join(return_chars)
+
+def chunk_expression(chunk_column, column_type, chunk_size):
+	"""Return the SQL expression of the chunk (key) of a row (see export_table_delta()).
+
+	Date columns are chunked by month ('YYYY-MM'), all other
+	(numeric, e.g., primary key) columns by ranges of chunk_size.
+	"""
+	if str(column_type).startswith(('date', 'timestamp')):
+		return "DATE_FORMAT(`" + chunk_column + "`, '%Y-%m')"
+
+	return "FLOOR(`" + chunk_column + "` / " + str(chunk_size) + ")"
+
+def chunk_predicate(chunk_column, column_type, chunk_key, chunk_size):
+	"""Return the SQL condition selecting the rows of a chunk (see chunk_expression())."""
+	if chunk_key == 'NULL':
+		return "`" + chunk_column + "` IS NULL"
+
+	if str(column_type).startswith(('date', 'timestamp')):
+		year, month = int(chunk_key[0:4]), int(chunk_key[5:7])
+		next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+		return ("`" + chunk_column + "` >= '" + datetime.date(year, month, 1).isoformat() + "' AND `" +
+			chunk_column + "` < '" + datetime.date(next_year, next_month, 1).isoformat() + "'")
+
+	return ("`" + chunk_column + "` >= " + str(int(chunk_key) * chunk_size) + " AND `" +
+		chunk_column + "` < " + str((int(chunk_key) + 1) * chunk_size))
+
+def format_insert_row(row):
+	"""Format a row as values of an INSERT statement, e.g., "('2022-10-26', 1, 'Nationalfeiertag')"."""
+	temp_str_data = "("
+
+	for k in row:
+		if type(k) == int:
+			temp_str_data += "" + str(k) + ", "
+		else:
+			temp_str_data += "'" + str(k) + "', "
+
+	# change the ending of the string
+	return temp_str_data[:-2] + ")"
+
+def write_insert_block(file_export_table, export_table, column_names, rows):
+	"""Write rows as INSERT INTO block (one row per line, see import_table()).
+
+	The rows may be any iterable (e.g., rows streamed from the
+	server). Returns the amount of written rows.
+	"""
+	count = 0
+
+	for row in rows:
+		if count == 0:
+			file_export_table.write('INSERT INTO `' + export_table + '` (' +
+				', '.join('`' + column + '`' for column in column_names) + ') VALUES \n')
+		else:
+			file_export_table.write(",\n")
+
+		file_export_table.write(format_insert_row(row))
+		count += 1
+
+	if count > 0:
+		file_export_table.write(";\n")
+
+	return count
+
+class MetadataCache:
+	"""Read-through cache of the metadata (databases, tables, columns) of the SQL server.
+
+	Entries expire after ttl seconds; if more than max_entries are
+	stored, the least recently used entry is evicted. The keys are
+	tuples, e.g., ('tables', database) or ('columns', database,
+	table), so that all entries of a database or table can be
+	invalidated at once (see invalidate()). The cache may be used
+	from several threads.
+	"""
+	def __init__(self, ttl = 300.0, max_entries = 256):
+		self.ttl = ttl
+		self.max_entries = max_entries
+		self.lock = threading.Lock()
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def get(self, key, load):
+		"""Return the cached value of key or load (and store) it via load()."""
+		with self.lock:
+			entry = self.entries.get(key)
+
+			if entry is not None and time.monotonic() - entry[0] < self.ttl:
+				self.entries.move_to_end(key)
+				self.hits += 1
+				return entry[1]
+
+			self.misses += 1
+
+		value = load()
+
+		with self.lock:
+			self.entries[key] = (time.monotonic(), value)
+			self.entries.move_to_end(key)
+
+			while len(self.entries) > self.max_entries:
+				self.entries.popitem(last = False)
+
+		return value
+
+	def invalidate(self, *key_prefix):
+		"""Remove all entries whose key starts with key_prefix (all entries if none is given)."""
+		with self.lock:
+			for key in [key for key in self.entries if key[:len(key_prefix)] == key_prefix]:
+				del self.entries[key]
 
 class SqlHandler:
 	"""This class handles access to the SQL server (connection, data manipulation, etc.).
@@ -22,20 +239,63 @@ class SqlHandler:
 	The SQL server can be a local one or a remote one. Various
 	different functions for setting up and initiating the
 	connection as well as access to the databases and tables
-	are provided in this class.
+	are provided in this class. The metadata (lists of the
+	databases and tables, columns of the tables) is cached (see
+	MetadataCache) and invalidated by the DDL statements of this
+	class (create_table(), drop_table(), truncate_table(), ...).
 	"""
-	def __init__(self):
+	def __init__(self, config = None, cache_ttl = 300.0, cache_size = 256):
 		"""Define the login credentials for accessing the database.
 
 		The credentials are the username, password and the host
-		where the SQL database(s) are located at.
+		where the SQL database(s) are located at. They are taken
+		from the given config (see load_config()), which is loaded
+		from the default path if no config is passed (raising a
+		FileNotFoundError if it does not exist). cache_ttl
+		(seconds) and cache_size (entries) bound the metadata cache.
 		"""
 		print ('creating sqlhandler class object (init)\n')
 
+		if config is None:
+			config = load_config()
+
 		# set the login credentials
-		self.sql_login_user		= dbLoginUser # loginCredentials.loginData["user"]
-		self.sql_login_password	= dbLoginPassword # loginCredentials.loginData["password"]
-		self.sql_login_host		= dbHostURL # loginCredentials.loginData["host"]
+		self.sql_login_user		= config.dbLoginUser
+		self.sql_login_password	= config.dbLoginPassword
+		self.sql_login_host		= config.dbHostURL
+
+		# amount of connections opened by this object (see connect())
+		self.connection_count = 0
+
+		# cache of the metadata (databases, tables, columns)
+		self.metadata_cache = MetadataCache(cache_ttl, cache_size)
+
+	def connect(self, select_database = None, allow_local_infile = False):
+		"""Open a new connection to the SQL server.
+
+		The connector (mysql.connector) is imported lazily on the
+		first connection so that importing this module stays cheap.
+		If select_database is given, the connection uses this
+		database as default. allow_local_infile enables LOAD DATA
+		LOCAL INFILE (see import_table_bulk()) for this connection.
+		"""
+		import mysql.connector as database
+
+		connect_args = {
+			'user': self.sql_login_user,
+			'password': self.sql_login_password,
+			'host': self.sql_login_host
+		}
+
+		if select_database is not None:
+			connect_args['database'] = select_database
+
+		if allow_local_infile:
+			connect_args['allow_local_infile'] = True
+
+		self.connection_count += 1
+
+		return database.connect(**connect_args)
 
 	def fetch_all_db(self, verbose):
 		"""Retrieve / list all existing databases.
@@ -43,17 +303,20 @@ class SqlHandler:
 		For the given SQL server connection, this function
 		returns all databases present. The verbose option
 		prints the retrieved information to the terminal.
+		The list is cached (see MetadataCache).
 		"""
-		connection = database.connect(
-			user = self.sql_login_user,
-			password = self.sql_login_password,
-			host = self.sql_login_host)
-		cursor = connection.cursor(dictionary = True)
+		def load():
+			connection = self.connect()
+			cursor = connection.cursor(dictionary = True)
 
-		cursor.execute("SHOW DATABASES")
-		return_all_db = cursor.fetchall()
+			cursor.execute("SHOW DATABASES")
+			return_all_db = cursor.fetchall()
 
-		connection.close()
+			connection.close()
+
+			return return_all_db
+
+		return_all_db = list(self.metadata_cache.get(('databases',), load))
 
 		# print all found databases (to the terminal)
 		if verbose == 1:
@@ -68,18 +331,20 @@ class SqlHandler:
 		For a given database, this function returns all tables
 		in this database on the SQL server. The verbose option
 		prints the retrieved information to the terminal.
+		The list is cached (see MetadataCache).
 		"""
-		connection = database.connect(
-			user = self.sql_login_user,
-			password = self.sql_login_password,
-			host = self.sql_login_host,
-			database = select_database)
-		cursor = connection.cursor(dictionary = True)
+		def load():
+			connection = self.connect(select_database)
+			cursor = connection.cursor(dictionary = True)
 
-		cursor.execute("SHOW TABLES")
-		return_all_tables = cursor.fetchall()
+			cursor.execute("SHOW TABLES")
+			return_all_tables = cursor.fetchall()
 
-		connection.close()
+			connection.close()
+
+			return return_all_tables
+
+		return_all_tables = list(self.metadata_cache.get(('tables', select_database), load))
 
 		if verbose == 1:
 			for row in return_all_tables:
@@ -97,19 +362,10 @@ class SqlHandler:
 		"""
 
 		"""
-		TODO: change this function so it can only fetch a certain amount of data as well as
-		only retrieve the column types ("SHOW COLUMNS ...")
+		TODO: change this function so it can only fetch a certain amount of data
 		"""
-		connection = database.connect(
-			user = self.sql_login_user,
-			password = self.sql_login_password,
-			host = self.sql_login_host,
-			database = select_database)
-		cursor = connection.cursor()
-
-		# fetch/print the header (table column names)
-		cursor.execute("SHOW COLUMNS FROM " + select_table)
-		return_table_header_data = cursor.fetchall()
+		# fetch/print the header (table column names, cached)
+		return_table_header_data = self.fetch_table_columns(select_database, select_table)
 
 		if verbose == 1:
 			for row in return_table_header_data:
@@ -117,6 +373,9 @@ class SqlHandler:
 			print('\n---------------------------------------------------')
 
 		# fetch/print the table column data
+		connection = self.connect(select_database)
+		cursor = connection.cursor()
+
 		cursor.execute("SELECT * FROM " + select_table)
 		return_table_contents = cursor.fetchall()
 
@@ -129,6 +388,104 @@ class SqlHandler:
 
 		return return_table_contents, return_table_header_data
 
+	def count_table_rows(self, select_database, select_table):
+		"""Return the amount of rows (COUNT(*)) of a table."""
+		connection = self.connect(select_database)
+		cursor = connection.cursor()
+
+		cursor.execute("SELECT COUNT(*) FROM " + select_table)
+		amount_rows = cursor.fetchall()[0][0]
+
+		connection.close()
+
+		return int(amount_rows)
+
+	def fetch_table_batches(self, select_database, select_table, batch_size = 1000,
+		select_columns = '*', condition = None, order_by = None):
+		"""Stream the rows of a table in batches (lists of at most batch_size rows).
+
+		Contrary to fetch_table_content(), the rows are not fetched
+		at once. Optionally, only the rows matching condition (SQL,
+		e.g., 'vorlesungsfrei = 1') are fetched, sorted by order_by.
+		Yields every batch together with the time (seconds) it took
+		to fetch it.
+		"""
+		query = "SELECT " + select_columns + " FROM " + select_table
+
+		if condition is not None:
+			query += " WHERE " + condition
+
+		if order_by is not None:
+			query += " ORDER BY " + order_by
+
+		connection = self.connect(select_database)
+		cursor = connection.cursor()
+
+		try:
+			cursor.execute(query)
+
+			while True:
+				t_start = time.perf_counter()
+				batch = cursor.fetchmany(batch_size)
+
+				if not batch:
+					break
+
+				yield batch, time.perf_counter() - t_start
+		finally:
+			connection.close()
+
+	def fetch_table_columns(self, select_database, select_table):
+		"""Return the columns (rows of SHOW COLUMNS: name, type, ...) of a table (cached)."""
+		def load():
+			connection = self.connect(select_database)
+			cursor = connection.cursor()
+
+			cursor.execute("SHOW COLUMNS FROM " + select_table)
+			return_columns = cursor.fetchall()
+
+			connection.close()
+
+			return return_columns
+
+		return list(self.metadata_cache.get(('columns', select_database, select_table), load))
+
+	def fetch_table_range(self, select_database, select_table, date_from, date_to,
+		select_columns = '*', date_column = 'date', read_only = False, verbose = False):
+		"""Fetch the rows of a table within a date range.
+
+		Contrary to fetch_table_content(), only the rows where
+		date_column lies between date_from and date_to (both
+		inclusive, format JJJJ-MM-DD) are fetched. If read_only is
+		set, the rows are read within a read-only transaction,
+		i.e., the connection cannot modify any data. Returns the
+		fetched rows and the names of the fetched columns.
+		"""
+		connection = self.connect(select_database)
+
+		if read_only:
+			connection.start_transaction(readonly = True)
+
+		cursor = connection.cursor()
+
+		cursor.execute(
+			"SELECT " + select_columns + " FROM " + select_table +
+			" WHERE " + date_column + " BETWEEN %s AND %s ORDER BY " + date_column,
+			(date_from, date_to))
+		return_table_contents = cursor.fetchall()
+		return_column_names = list(cursor.column_names)
+
+		if read_only:
+			connection.rollback()
+
+		connection.close()
+
+		if verbose == 1:
+			for row in return_table_contents:
+				print(row)
+
+		return return_table_contents, return_column_names
+
 	def insert_into_table(self, select_database, insert_statement, insert_data, verbose):
 		"""Insert data into a table of a database.
 
@@ -137,11 +494,7 @@ class SqlHandler:
 		database (select_database). The verbose option
 		prints the retrieved information to the terminal.
 		"""
-		connection = database.connect(
-			user = self.sql_login_user,
-			password = self.sql_login_password,
-			host = self.sql_login_host,
-			database = select_database)
+		connection = self.connect(select_database)
 		cursor = connection.cursor()
 
 		if verbose == 1:
@@ -153,6 +506,51 @@ class SqlHandler:
 		connection.commit()
 		connection.close()
 
+	def insert_batches_into_table(self, select_database, insert_statement, insert_batches, verbose = False,
+		on_batch = None):
+		"""Insert batches of rows into a table of a database.
+
+		Contrary to insert_into_table(), a single connection is used
+		for all rows. Each batch (a list of insert_data tuples) of
+		insert_batches is inserted via executemany() within its own
+		transaction, i.e., a batch is either inserted completely or
+		(upon an error) not at all. The optional function
+		on_batch(amount_rows, seconds) is called after every inserted
+		batch. Returns the amount of inserted rows.
+		"""
+		connection = self.connect(select_database)
+		cursor = connection.cursor()
+		amount_inserted = 0
+
+		try:
+			for insert_batch in insert_batches:
+				if not insert_batch:
+					continue
+
+				if verbose == 1:
+					print("inserting batch into db: ", select_database,
+					": statement: ", insert_statement,
+					"; amount of rows: ", len(insert_batch))
+
+				t_start = time.perf_counter()
+				connection.start_transaction()
+
+				try:
+					cursor.executemany(insert_statement, insert_batch)
+					connection.commit()
+				except Exception:
+					connection.rollback()
+					raise
+
+				amount_inserted += len(insert_batch)
+
+				if on_batch is not None:
+					on_batch(len(insert_batch), time.perf_counter() - t_start)
+		finally:
+			connection.close()
+
+		return amount_inserted
+
 	def create_table(self, select_database, table_name, column_info):
 		"""Create a new table.
 
@@ -160,14 +558,7 @@ class SqlHandler:
 		creates a new table (table_name) in the given database
 		(select_database).
 		"""
-		connection = database.connect(
-			user = self.sql_login_user,
-			password = self.sql_login_password,
-			host = self.sql_login_host,
-			database = select_database)
-		cursor = connection.cursor()
-
-		# check, whether the table already exists in the DB
+		# check, whether the table already exists in the DB (cached list of tables)
 		all_tables = self.fetch_all_tables(select_database, 0)
 		table_exists = False
 
@@ -178,22 +569,177 @@ class SqlHandler:
 				break
 
 		if table_exists == False:
+			connection = self.connect(select_database)
+			cursor = connection.cursor()
 			cursor.execute("CREATE TABLE " + table_name + " (" + column_info + ")")
+			connection.close()
+
+			self.invalidate_table_metadata(select_database, table_name)
+
+	def invalidate_table_metadata(self, select_database, table_name):
+		"""Remove the cached list of tables and the cached columns of a table."""
+		self.metadata_cache.invalidate('tables', select_database)
+		self.metadata_cache.invalidate('columns', select_database, table_name)
+
+	def create_calendar_table(self, select_database, table_name, partition_years = None, verbose = False):
+		"""Create the calendar table (managed layout) or complete an existing one.
+
+		The table is created with the columns and indexes as given by
+		calendar_columns and calendar_indexes (unique key on the date)
+		if it does not exist yet. Missing indexes of an existing table
+		are created (see ensure_calendar_indexes()). If partition_years
+		(list of academic years) is given, the table is partitioned by
+		academic year (RANGE on the date, see academic_year_partitions())
+		and partitions of missing (later) years are added. Note that an
+		existing table can only be partitioned if all its unique keys
+		(incl. the primary key) contain the date. All steps are
+		idempotent. Returns the executed statements.
+		"""
+		executed_statements = []
+
+		connection = self.connect(select_database)
+		cursor = connection.cursor()
+
+		try:
+			cursor.execute("SHOW TABLES LIKE %s", (table_name,))
+			table_exists = len(cursor.fetchall()) > 0
+
+			if not table_exists:
+				statement = ("CREATE TABLE `" + table_name + "` (" +
+					", ".join(calendar_columns + [index_definition(*index) for index in calendar_indexes]) +
+					") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4")
+
+				if partition_years:
+					statement += (" PARTITION BY RANGE (TO_DAYS(`date`)) (" +
+						", ".join(academic_year_partitions(partition_years)) + ")")
+
+				cursor.execute(statement)
+				executed_statements.append(statement)
+		finally:
+			connection.close()
+
+		if executed_statements:
+			self.invalidate_table_metadata(select_database, table_name)
+
+		if table_exists:
+			executed_statements += self.ensure_calendar_indexes(select_database, table_name)
+
+			if partition_years:
+				executed_statements += self.ensure_calendar_partitions(select_database, table_name, partition_years)
+
+		if verbose == 1:
+			for statement in executed_statements:
+				print(statement)
+
+		return executed_statements
+
+	def fetch_table_indexes(self, select_database, table_name):
+		"""Return the indexes of a table as dictionary (name -> (unique, columns))."""
+		connection = self.connect(select_database)
+		cursor = connection.cursor(dictionary = True)
+
+		cursor.execute("SHOW INDEX FROM `" + table_name + "`")
+		index_rows = cursor.fetchall()
 
 		connection.close()
 
+		return_indexes = {}
+
+		for row in sorted(index_rows, key = lambda row: (row['Key_name'], row['Seq_in_index'])):
+			unique, columns = return_indexes.get(row['Key_name'], (int(row['Non_unique']) == 0, ()))
+			return_indexes[row['Key_name']] = (unique, columns + (row['Column_name'],))
+
+		return return_indexes
+
+	def ensure_calendar_indexes(self, select_database, table_name):
+		"""Create the missing indexes (see calendar_indexes) of the calendar table.
+
+		An index is considered present if an index with the same
+		name or with the same columns (and uniqueness) exists, i.e.,
+		calling this function repeatedly does not create duplicate
+		indexes. The cached metadata of the table is invalidated.
+		Returns the executed statements.
+		"""
+		existing_indexes = self.fetch_table_indexes(select_database, table_name)
+		executed_statements = []
+
+		for index_name, unique, columns in calendar_indexes:
+			if index_name in existing_indexes or (unique, columns) in existing_indexes.values():
+				continue
+
+			statement = "ALTER TABLE `" + table_name + "` ADD " + index_definition(index_name, unique, columns)
+			executed_statements.append(statement)
+
+		if executed_statements:
+			connection = self.connect(select_database)
+			cursor = connection.cursor()
+
+			try:
+				for statement in executed_statements:
+					cursor.execute(statement)
+			finally:
+				connection.close()
+
+				# the keys of the columns have changed (even if a later ALTER failed)
+				self.invalidate_table_metadata(select_database, table_name)
+
+		return executed_statements
+
+	def ensure_calendar_partitions(self, select_database, table_name, partition_years):
+		"""Partition the calendar table by academic year (or add missing partitions).
+
+		An unpartitioned table is partitioned by the given years. In
+		an already partitioned table, the years after the last
+		existing year partition are split off the partition pmax
+		(earlier years are already held by the first partition).
+		The cached metadata of the table is invalidated. Returns the
+		executed statements.
+		"""
+		connection = self.connect(select_database)
+		cursor = connection.cursor()
+		statement = None
+
+		try:
+			cursor.execute(
+				"SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+				"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL",
+				(table_name,))
+			partition_names = [row[0] for row in cursor.fetchall()]
+
+			existing_years = [int(name[1:]) for name in partition_names if name[1:].isdigit()]
+
+			if not partition_names:
+				statement = ("ALTER TABLE `" + table_name + "` PARTITION BY RANGE (TO_DAYS(`date`)) (" +
+					", ".join(academic_year_partitions(partition_years)) + ")")
+			else:
+				last_year = max(existing_years) if existing_years else None
+				missing_years = [year for year in sorted(set(partition_years)) if last_year is None or year > last_year]
+
+				if not missing_years or 'pmax' not in partition_names:
+					return []
+
+				statement = ("ALTER TABLE `" + table_name + "` REORGANIZE PARTITION pmax INTO (" +
+					", ".join(academic_year_partitions(missing_years)) + ")")
+
+			cursor.execute(statement)
+		finally:
+			connection.close()
+
+			if statement is not None:
+				self.invalidate_table_metadata(select_database, table_name)
+
+		return [statement]
+
 	def drop_table(self, select_database, delete_table):
 		'''This function deletes a table from a selected database.'''
-		connection = database.connect(
-			user = self.sql_login_user,
-			password = self.sql_login_password,
-			host = self.sql_login_host,
-			database = select_database)
+		connection = self.connect(select_database)
 		cursor = connection.cursor()
 		sql = "DROP TABLE " + delete_table
 		cursor.execute(sql) 
 		connection.close()
 
+		self.invalidate_table_metadata(select_database, delete_table)
+
 	def truncate_table(self, select_database, truncate_table):
 		"""Clear (truncate) a table.
 
@@ -202,17 +748,16 @@ class SqlHandler:
 		truncation, i.e., all information in the table is
 		cleared (truncated).
 		"""
-		connection = database.connect(
-			user = self.sql_login_user,
-			password = self.sql_login_password,
-			host = self.sql_login_host,
-			database = select_database)
+		connection = self.connect(select_database)
 		cursor = connection.cursor()
 		sql = "TRUNCATE TABLE " + truncate_table
 		cursor.execute(sql) 
 		connection.close()
 
-	def export_table(self, path, append_only, export_db, export_table):
+		self.invalidate_table_metadata(select_database, truncate_table)
+
+	def export_table(self, path, append_only, export_db, export_table, export_format = 'sql',
+		batch_size = 1000, progress = None):
 		"""Export a table from the SQL server to a (local) file on the disk.
 
 		Export a table (into a file on the disk).
@@ -224,7 +769,53 @@ class SqlHandler:
 		option append_only is used to append to an (external)
 		file on the disk. If this variable is set to False,
 		a header (CREATE TABLE ...) will be written to the file.
+		With export_format 'csv' or 'tsv', the table is exported
+		as comma/tab separated values instead (header row with the
+		column names unless append_only is set, NULL as \\N), which
+		can be loaded via import_table_bulk(). The rows are streamed
+		from the server in batches of batch_size rows; the progress
+		(rows, bytes, throughput, latency of the batches, ETA based on
+		COUNT(*)) is reported via progress (see progress.py). The rows
+		are only counted (a scan of the table) if progress is given.
+		"""
+		if progress is None:
+			progress = transfer_progress.null_progress()
+		else:
+			progress.set_totals(total_rows = self.count_table_rows(export_db, export_table))
+
+		try:
+			if export_format in ('csv', 'tsv'):
+				self.export_table_csv(path, append_only, export_db, export_table, export_format, batch_size, progress)
+			else:
+				self.export_table_sql(path, append_only, export_db, export_table, batch_size, progress)
+		except BaseException:
+			progress.finish('failed')
+			raise
+
+		progress.finish()
+
+	def export_rows(self, file_export_table, export_db, export_table, batch_size, progress):
+		"""Stream the rows of a table (see fetch_table_batches()) and report the progress.
+
+		The progress of a batch (rows, written bytes, time to fetch
+		and write the batch) is reported once it has been written
+		into file_export_table.
 		"""
+		position = file_export_table.tell()
+
+		for batch, fetch_seconds in self.fetch_table_batches(export_db, export_table, batch_size):
+			t_start = time.perf_counter()
+
+			yield from batch
+
+			batch_position = file_export_table.tell()
+			progress.update(len(batch), batch_position - position, fetch_seconds + time.perf_counter() - t_start)
+			position = batch_position
+
+	def export_table_sql(self, path, append_only, export_db, export_table, batch_size = 1000, progress = None):
+		"""Export a table as SQL file (see export_table())."""
+		if progress is None:
+			progress = transfer_progress.null_progress()
 
 		# write header information
 		file_export_table = open(path, "w")
@@ -232,8 +823,8 @@ class SqlHandler:
 		file_export_table.write('START TRANSACTION;\n')
 		file_export_table.write('SET time_zone = "+00:00";\n\n')
 
-		# fetch the data
-		read_table_data, read_table_header = self.fetch_table_content(export_db, export_table, 0)
+		# fetch the columns (the data is streamed below)
+		read_table_header = self.fetch_table_columns(export_db, export_table)
 
 		if append_only == False:
 			file_export_table.write('CREATE TABLE `' + export_table + '` (\n')
@@ -266,44 +857,135 @@ class SqlHandler:
 
 			file_export_table.write(") ENGINE=InnoDB DEFAULT CHARSET=latin1;\n\n")
 
-		# create/write the data
-		#
-		# HEADER:
-		file_export_table.write('INSERT INTO `' + export_table + '` ')
+		# create/write the data (header and data block)
+		write_insert_block(file_export_table, export_table,
+			[add_header_cols[0] for add_header_cols in read_table_header],
+			self.export_rows(file_export_table, export_db, export_table, batch_size, progress))
 
-		tmpStr1 = "("
+		file_export_table.write("\nCOMMIT;")
 
-		for add_header_cols in read_table_header:
-			tmpStr1 += '`' + add_header_cols[0] + '`, '
+		file_export_table.close()
 
-		# change the ending of the string
-		tmpStr1 = tmpStr1[:-2] + ")"
+	def export_table_csv(self, path, append_only, export_db, export_table, export_format = 'csv',
+		batch_size = 1000, progress = None):
+		"""Export a table as CSV/TSV file (see export_table())."""
+		if progress is None:
+			progress = transfer_progress.null_progress()
+
+		read_table_header = self.fetch_table_columns(export_db, export_table)
+
+		with open(path, 'a' if append_only else 'w', encoding = 'utf-8', newline = '') as fp:
+			writer = csv.writer(fp, delimiter = '\t' if export_format == 'tsv' else ',', lineterminator = '\n')
+
+			if append_only == False:
+				writer.writerow([column[0] for column in read_table_header])
+
+			for row in self.export_rows(fp, export_db, export_table, batch_size, progress):
+				writer.writerow(['\\N' if value is None else value for value in row])
+
+	def export_table_delta(self, path, manifest_path, export_db, export_table,
+		chunk_column = 'date', chunk_size = 1000, verbose = False):
+		"""Export only the changed parts of a table (incremental export).
+
+		The table is split into chunks of chunk_column (months of a
+		date column or ranges of chunk_size keys, see
+		chunk_expression()). A checksum (amount of rows, XOR and sum
+		of the CRC32 of all rows) of every chunk is computed by the
+		server and compared against the checksums stored in the
+		manifest (JSON) of the previous run. Only the rows of new or
+		changed chunks are fetched and written as delta file: per
+		changed (or removed) chunk a DELETE of the chunk followed by
+		the INSERT INTO block of its rows, which import_table() can
+		apply to the (restored) table. Without a manifest, all chunks
+		are exported. The manifest is replaced afterwards. Returns
+		the keys of the changed and removed chunks and the amount of
+		unchanged chunks.
+		"""
+		columns = self.fetch_table_columns(export_db, export_table)
+		column_names = [column[0] for column in columns]
+		column_type = dict((column[0], column[1]) for column in columns)[chunk_column]
 
-		file_export_table.write(tmpStr1 + " VALUES \n")
+		previous_chunks = {}
 
-		# DATA (loop through the 'data block'):
-		for count, i in enumerate(read_table_data):
-			temp_str_data = "("
+		if os.path.isfile(manifest_path):
+			with open(manifest_path, encoding = 'utf-8') as fp:
+				previous_manifest = json.load(fp)
 
-			for k in i:
-				if type(k) == int:
-					temp_str_data += "" + str(k) + ", "
-				else:
-					temp_str_data += "'" + str(k) + "', "
+			# a changed layout invalidates the manifest (full export)
+			if (previous_manifest.get('chunk_column') == chunk_column and
+				previous_manifest.get('chunk_size') == chunk_size and
+				previous_manifest.get('columns') == column_names):
+				previous_chunks = previous_manifest['chunks']
 
-			# change the ending of the string
-			temp_str_data = temp_str_data[:-2] + ")"
+		# checksum of every row (NULL values marked via ISNULL())
+		row_checksum = "CRC32(CONCAT_WS(0x1f, " + ", ".join(
+			"`" + column + "`, ISNULL(`" + column + "`)" for column in column_names) + "))"
 
-			if count == len(read_table_data)-1:
-				file_export_table.write(temp_str_data + ";\n")
-			else:
-				file_export_table.write(temp_str_data + ",\n")
+		connection = self.connect(export_db)
+		cursor = connection.cursor()
 
-		file_export_table.write("\nCOMMIT;")
+		try:
+			cursor.execute(
+				"SELECT " + chunk_expression(chunk_column, column_type, chunk_size) + " AS chunk, COUNT(*), " +
+				"BIT_XOR(" + row_checksum + "), SUM(" + row_checksum + ") FROM `" + export_table + "` GROUP BY chunk")
+
+			chunks = {}
+
+			for chunk_key, amount_rows, checksum_xor, checksum_sum in cursor.fetchall():
+				chunk_key = 'NULL' if chunk_key is None else str(chunk_key)
+				chunks[chunk_key] = {
+					'rows': int(amount_rows),
+					'checksum': '%08x:%x' % (int(checksum_xor), int(checksum_sum))
+				}
+
+			changed_chunks = sorted(key for key in chunks if previous_chunks.get(key) != chunks[key])
+			removed_chunks = sorted(key for key in previous_chunks if key not in chunks)
+
+			with open(path, 'w', encoding = 'utf-8') as file_export_table:
+				file_export_table.write('SET SQL_MODE = "NO_AUTO_VALUE_ON_ZERO";\n')
+				file_export_table.write('START TRANSACTION;\n')
+				file_export_table.write('SET time_zone = "+00:00";\n\n')
+
+				for chunk_key in removed_chunks + changed_chunks:
+					predicate = chunk_predicate(chunk_column, column_type, chunk_key, chunk_size)
+					file_export_table.write('DELETE FROM `' + export_table + '` WHERE ' + predicate + ';\n')
+
+					if chunk_key in chunks:
+						cursor.execute("SELECT " + ", ".join('`' + column + '`' for column in column_names) +
+							" FROM `" + export_table + "` WHERE " + predicate)
+						write_insert_block(file_export_table, export_table, column_names, cursor.fetchall())
+
+					file_export_table.write('\n')
+
+				file_export_table.write("COMMIT;")
+		finally:
+			connection.close()
+
+		# replace the manifest (only after the delta has been written)
+		manifest = {
+			'database': export_db,
+			'table': export_table,
+			'chunk_column': chunk_column,
+			'chunk_size': chunk_size,
+			'columns': column_names,
+			'chunks': chunks
+		}
+
+		with open(manifest_path + '.tmp', 'w', encoding = 'utf-8') as fp:
+			json.dump(manifest, fp, indent = 4)
+		os.replace(manifest_path + '.tmp', manifest_path)
 
-		file_export_table.close()
+		if verbose == 1:
+			print('delta export of', export_table + ':', len(changed_chunks), 'changed,',
+				len(removed_chunks), 'removed,', len(chunks) - len(changed_chunks), 'unchanged chunks')
+
+		return {
+			'changed': changed_chunks,
+			'removed': removed_chunks,
+			'unchanged': len(chunks) - len(changed_chunks)
+		}
 
-	def import_table(self, path, import_target_db):
+	def import_table(self, path, import_target_db, progress = None):
 		"""Import a (local) file into the SQL server.
 
 		This function takes a path to a local SQL file as stated
@@ -338,66 +1020,303 @@ class SqlHandler:
 
 		COMMIT;
 		------------------------------------------------------------
+
+		DELETE statements (e.g., of a delta file, see
+		export_table_delta()) are executed as well. The progress
+		(rows, bytes, throughput, latency of the inserts, ETA based on
+		the size of the file) is reported via progress (see
+		progress.py).
 		"""
+		if progress is None:
+			progress = transfer_progress.null_progress()
+
+		progress.set_totals(total_bytes = os.path.getsize(path))
+
+		try:
+			self.import_file(path, import_target_db, progress)
+		except BaseException:
+			progress.finish('failed')
+			raise
+
+		progress.finish()
+
+	def import_file(self, path, import_target_db, progress):
+		"""Parse a dump (see parse_dump()) and import it (see import_table())."""
+		insert_statements = {}
+
 		# open the file; parse it line, by line
 		with open(path, encoding = 'utf-8') as fp:
-			line = fp.readline()
+			def readline():
+				read_line = fp.readline()
+				progress.update(amount_bytes = len(read_line.encode('utf-8')))
+				return read_line
+
+			for kind, table_name, columns, row in self.parse_dump(readline, import_target_db):
+				if kind == 'delete':
+					self.execute_statements(import_target_db, [row])
+				elif kind == 'create':
+					self.create_table(import_target_db, table_name, columns)
+				else:
+					key = (table_name, tuple(columns))
+
+					if key not in insert_statements:
+						insert_statements[key] = (
+							"INSERT INTO " + table_name + " (" + ", ".join(columns) + ") "
+							"VALUES (" + ", ".join(["%s"] * len(columns)) + ")"
+						)
+
+					t_start = time.perf_counter()
+					self.insert_into_table(import_target_db, insert_statements[key], row, 0)
+					progress.update(1, batch_seconds = time.perf_counter() - t_start)
+
+	def parse_dump(self, readline, import_target_db):
+		"""Parse a dump (see import_table()) into its statements.
+
+		The lines are read via readline(). Yields (kind, table name,
+		columns, row) for every statement:
+		('create', table, column definitions, None) for a CREATE TABLE
+		block, ('delete', table, None, statement) for a DELETE statement
+		(delta files, see export_table_delta()) and ('insert', table,
+		column names, row) for every row of an INSERT INTO block. The
+		column types of the rows (int columns are converted, see
+		extractInsertInformation()) are read from the table, hence the
+		table of a 'create' item has to be created by the caller before
+		the next item is requested.
+		"""
+		line = readline()
 
-			while line:
-				#print("{}".format(line.strip()))
-				line = fp.readline()
-				# TODO: IGNORE COMMENTS (lines starting with "/*" or "---"
+		while line:
+			# TODO: IGNORE COMMENTS (lines starting with "/*" or "---"
 
-				# 'CREATE TABLE' block
-				if line.find('CREATE TABLE') != -1:
-					createTableName = line.split()[2].replace('`', '')
-					line = fp.readline()
+			# 'DELETE FROM' statement (delta files)
+			if line.startswith('DELETE FROM'):
+				yield 'delete', line.split('`')[1], None, line.strip().rstrip(';')
 
-					# extract column information for the creation of the table
-					# e.g.: "`IP` text NOT NULL,`Date` datetime NOT NULL"
-					create_table_col_info = []
+			# 'CREATE TABLE' block
+			elif line.find('CREATE TABLE') != -1:
+				createTableName = line.split()[2].replace('`', '')
+				line = readline()
 
-					while line.find(';') == -1:
-						create_table_col_info.append(line.strip())
-						line = fp.readline()
+				# extract column information for the creation of the table
+				# e.g.: "`IP` text NOT NULL,`Date` datetime NOT NULL"
+				create_table_col_info = []
 
-					createArgs = ''.join(create_table_col_info)
+				while line.find(';') == -1:
+					create_table_col_info.append(line.strip())
+					line = readline()
 
-					# create the table
-					self.create_table(import_target_db, createTableName, createArgs)
+				yield 'create', createTableName, ''.join(create_table_col_info), None
 
-				# 'INSERT INTO' block
-				if line.find('INSERT INTO') != -1:
-					import_table_name, returnColumns = self.extract_table_headers(line)
+			# 'INSERT INTO' block
+			elif line.find('INSERT INTO') != -1:
+				import_table_name, returnColumns = self.extract_table_headers(line)
 
-					# create the insert data
-					insertColsJoined = ", ".join(returnColumns)
+				# extract column types (if int -> conversion in the extracted data must be performed
+				# to ensure a string is in the tuple which is bein inserted into the db (stored in insertData
+				column_type = [var[1] for var in self.fetch_table_columns(import_target_db, import_table_name)]
 
-					# create the correct (amount of) placeholders(%s)
-					placeholder = "%s"
-					placeholder = [placeholder]*len(returnColumns)
-					placeholder = ", ".join(placeholder)
+				# continue until the last line is reached (marked by the trailing semicolon)
+				while line.strip()[-1] != ";":
+					line = readline()	# read the next line
 
-					insertStatement = (
-						"INSERT INTO " + import_table_name + " (" + insertColsJoined + ") "
-						"VALUES (" + placeholder + ")"
-					)
+					yield 'insert', import_table_name, returnColumns, self.extractInsertInformation(line, column_type)
 
-					# continue until the last line is reached (marked by the trailing semicolon)
-					while line.strip()[-1] != ";":
+			line = readline()
 
-						line = fp.readline()	# read the next line
+	def execute_statements(self, select_database, statements):
+		"""Execute the given statements (e.g., DELETEs) in a single transaction."""
+		connection = self.connect(select_database)
+		cursor = connection.cursor()
 
-						# extract column types (if int -> conversion in the extracted data must be performed
-						# to ensure a string is in the tuple which is bein inserted into the db (stored in insertData
-						dummyVar, colTypesReturn = self.fetch_table_content(import_target_db, import_table_name, 0)
-						column_type = [] # type of columns, e.g., text, datetime, int, etc.
-						for var in colTypesReturn:
-							column_type.append(var[1])
+		try:
+			for statement in statements:
+				cursor.execute(statement)
+			connection.commit()
+		finally:
+			connection.close()
+
+	def import_table_bulk(self, path, import_target_db, import_table_name = None, batch_size = 1000, verbose = False,
+		progress = None):
+		"""Import a dump or a CSV/TSV export via LOAD DATA LOCAL INFILE.
+
+		Contrary to import_table(), the rows are not inserted one by
+		one: the file is converted into staged (tab separated)
+		temporary files, one per table (see stage_import_file()),
+		which are loaded by the server's bulk loader. If the server
+		(or the client) disallows local files, the staged rows are
+		inserted in batches of batch_size rows instead (see
+		insert_batches_into_table()). A CSV/TSV file (header row with
+		the column names, see export_table()) is loaded into the
+		existing table import_table_name (default: the filename
+		without its extension). The DELETE statements of a delta file
+		(see export_table_delta()) are executed (in one transaction)
+		before the staged files are loaded, i.e., the rows of changed
+		chunks replace the old ones and removed chunks are removed. The
+		progress (ETA based on the size of the staged files) is reported
+		via progress (see progress.py). Returns the amount of imported
+		rows.
+		"""
+		if progress is None:
+			progress = transfer_progress.null_progress()
+
+		staged_tables, delete_statements = self.stage_import_file(path, import_target_db, import_table_name)
+		amount_imported = 0
+
+		progress.set_totals(total_bytes = sum(os.path.getsize(staging_path) for table_name, columns, staging_path in staged_tables))
+
+		try:
+			# the chunks of a delta file are removed before their rows are loaded
+			if delete_statements:
+				self.execute_statements(import_target_db, delete_statements)
+
+			for table_name, columns, staging_path in staged_tables:
+				try:
+					t_start = time.perf_counter()
+					amount_loaded = self.load_staged_file(staging_path, import_target_db, table_name, columns)
+					progress.update(amount_loaded, os.path.getsize(staging_path), time.perf_counter() - t_start)
+				except Exception as error:
+					if getattr(error, 'errno', None) not in local_infile_errors:
+						raise
+
+					print('LOAD DATA LOCAL INFILE not allowed (' + str(error) + '), using batched inserts')
+					progress.log.append_to_log('LOAD DATA LOCAL INFILE not allowed (' + str(error) + '), using batched inserts')
+					amount_loaded = self.insert_staged_file(staging_path, import_target_db, table_name, columns,
+						batch_size, progress)
+
+				if verbose == 1:
+					print('imported', amount_loaded, 'rows into', table_name)
+
+				amount_imported += amount_loaded
+		except BaseException:
+			progress.finish('failed')
+			raise
+		finally:
+			for table_name, columns, staging_path in staged_tables:
+				os.remove(staging_path)
+
+		progress.finish()
+
+		return amount_imported
+
+	def stage_import_file(self, path, import_target_db, import_table_name = None):
+		"""Convert a dump or a CSV/TSV export into staged files (for LOAD DATA INFILE).
+
+		The rows are written as tab separated values (escaped via
+		escape_infile_field()) into temporary files. Tables defined
+		in a dump (CREATE TABLE block) are created first. Returns a
+		list of (table name, column names, path of the staged file)
+		and the list of the DELETE statements of the dump (delta
+		files), which have to be executed before the files are loaded.
+		"""
+		staged_tables = []
+		staging_files = {}
+		delete_statements = []
+
+		def staging_file(table_name, columns):
+			key = (table_name, tuple(columns))
+
+			if key not in staging_files:
+				file_descriptor, staging_path = tempfile.mkstemp(prefix = 'import_' + table_name + '_', suffix = '.tsv')
+				staging_files[key] = open(file_descriptor, 'w', encoding = 'utf-8', newline = '\n')
+				staged_tables.append((table_name, list(columns), staging_path))
+
+			return staging_files[key]
+
+		def write_row(fp, row):
+			fp.write('\t'.join(escape_infile_field(value) for value in row) + '\n')
+
+		try:
+			with open(path, encoding = 'utf-8', newline = '') as fp:
+				if path.endswith('.csv') or path.endswith('.tsv'):
+					if import_table_name is None:
+						import_table_name = os.path.splitext(os.path.basename(path))[0]
+
+					reader = csv.reader(fp, delimiter = '\t' if path.endswith('.tsv') else ',')
+					columns = next(reader)
+					staged_fp = staging_file(import_table_name, columns)
 
-						insertData = self.extractInsertInformation(line, column_type)
+					for row in reader:
+						write_row(staged_fp, [None if value == '\\N' else value for value in row])
+				else:
+					self.stage_dump(fp, import_target_db, staging_file, write_row, delete_statements)
+		except BaseException:
+			for staged_fp in staging_files.values():
+				staged_fp.close()
+			for table_name, columns, staging_path in staged_tables:
+				os.remove(staging_path)
+			raise
+
+		for staged_fp in staging_files.values():
+			staged_fp.close()
 
-						self.insert_into_table(import_target_db, insertStatement, insertData, 0)
+		return staged_tables, delete_statements
+
+	def stage_dump(self, fp, import_target_db, staging_file, write_row, delete_statements):
+		"""Parse a dump (see parse_dump()) and write its rows into the staged files.
+
+		The DELETE statements (delta files) are collected in
+		delete_statements (executed before the staged files are loaded).
+		"""
+		for kind, table_name, columns, row in self.parse_dump(fp.readline, import_target_db):
+			if kind == 'delete':
+				delete_statements.append(row)
+			elif kind == 'create':
+				self.create_table(import_target_db, table_name, columns)
+			else:
+				write_row(staging_file(table_name, columns), row)
+
+	def load_staged_file(self, staging_path, select_database, table_name, columns):
+		"""Load a staged file (see stage_import_file()) via LOAD DATA LOCAL INFILE."""
+		connection = self.connect(select_database, allow_local_infile = True)
+		cursor = connection.cursor()
+
+		try:
+			cursor.execute(
+				"LOAD DATA LOCAL INFILE %s INTO TABLE `" + table_name + "` CHARACTER SET utf8mb4 (" +
+				", ".join('`' + column + '`' for column in columns) + ")",
+				(staging_path,))
+			amount_loaded = cursor.rowcount
+			connection.commit()
+		finally:
+			connection.close()
+
+		return amount_loaded
+
+	def insert_staged_file(self, staging_path, select_database, table_name, columns, batch_size = 1000,
+		progress = None):
+		"""Insert the rows of a staged file in batches (fallback of load_staged_file())."""
+		if progress is None:
+			progress = transfer_progress.null_progress()
+
+		insert_statement = (
+			"INSERT INTO `" + table_name + "` (" + ", ".join('`' + column + '`' for column in columns) + ") "
+			"VALUES (" + ", ".join(["%s"] * len(columns)) + ")"
+		)
+
+		# bytes (of the staged file) of the batch currently inserted
+		batch_bytes = [0]
+
+		def read_batches():
+			insert_batch = []
+
+			with open(staging_path, encoding = 'utf-8', newline = '\n') as fp:
+				for line in fp:
+					insert_batch.append(tuple(unescape_infile_field(field) for field in line[:-1].split('\t')))
+					batch_bytes[0] += len(line.encode('utf-8'))
+
+					if len(insert_batch) >= batch_size:
+						yield insert_batch
+						insert_batch = []
+
+			if insert_batch:
+				yield insert_batch
+
+		def on_batch(amount_rows, seconds):
+			progress.update(amount_rows, batch_bytes[0], seconds)
+			batch_bytes[0] = 0
+
+		return self.insert_batches_into_table(select_database, insert_statement, read_batches(),
+			on_batch = on_batch)
 
 	def determine_endpoint(self, process_str):
 		"""Helper function used by extractInsertInformation() to extract data endpoints.
@@ -467,10 +1386,13 @@ class SqlHandler:
 		while i < len(read_insert_line):
 			i += 1
 
-			if read_insert_line[i] != end_str:
+			# the last element (e.g., a number) is not followed by its endpoint
+			end_reached = i >= len(read_insert_line)
+
+			if not end_reached and read_insert_line[i] != end_str:
 				temp_str += read_insert_line[i]
 			else:
-				if (end_str == "'" and read_insert_line[i-1] != "\\") or end_str == ',':
+				if end_reached or (end_str == "'" and read_insert_line[i-1] != "\\") or end_str == ',':
 					# if the read string is 'none' it must be converted to an int in case of the table
 					# expecting and int as datatype in the DB (else an error is thrown)
 					if column_type[insertPosition].find("int") == 0:
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+"""
+Offline generator of the (austrian) statutory holidays.
+
+The statutory holidays consist of fixed dates (e.g., Neujahr) and
+dates relative to Easter Sunday (e.g., Ostermontag). They are computed
+locally for any span of years, i.e., without fetching the page of the
+statutory holidays. The scraped page may still be used to cross-check
+the generated holidays (see cross_check_holidays()).
+"""
+
+import datetime
+
+import events
+
+# statutory holidays on fixed dates: (description, month, day)
+fixed_holidays = (
+	('Neujahr', 1, 1),
+	('Heilige Drei Könige', 1, 6),
+	('Staatsfeiertag', 5, 1),
+	('Mariä Himmelfahrt', 8, 15),
+	('Nationalfeiertag', 10, 26),
+	('Allerheiligen', 11, 1),
+	('Mariä Empfängnis', 12, 8),
+	('Christtag', 12, 25),
+	('Stefanitag', 12, 26)
+)
+
+# statutory holidays relative to Easter Sunday: (description, offset in days)
+easter_holidays = (
+	('Ostermontag', 1),
+	('Christi Himmelfahrt', 39),
+	('Pfingstmontag', 50),
+	('Fronleichnam', 60)
+)
+
+
+def easter_sunday(year):
+	"""Return the date of Easter Sunday (gregorian calendar) of the given year.
+
+	The date is computed via the anonymous gregorian algorithm
+	(Meeus/Jones/Butcher).
+	"""
+	a = year % 19
+	b = year // 100
+	c = year % 100
+	d = b // 4
+	e = b % 4
+	f = (b + 8) // 25
+	g = (b - f + 1) // 3
+	h = (19 * a + b - d - g + 15) % 30
+	i = c // 4
+	k = c % 4
+	l = (32 + 2 * e + 2 * i - h - k) % 7
+	m = (a + 11 * h + 22 * l) // 451
+	month = (h + l - 7 * m + 114) // 31
+	day = ((h + l - 7 * m + 114) % 31) + 1
+
+	return datetime.date(year, month, day)
+
+
+def generate_statutory_holidays(first_year, last_year):
+	"""Generate the statutory holidays of the years first_year to last_year.
+
+	The holidays (sorted by date) are returned like the extracted
+	ones as event list (see events.EventList).
+	"""
+	generated_events = []
+
+	for year in range(first_year, last_year + 1):
+		for event_description, month, day in fixed_holidays:
+			generated_events.append((datetime.date(year, month, day), event_description))
+
+		easter_date = easter_sunday(year)
+
+		for event_description, offset in easter_holidays:
+			generated_events.append((easter_date + datetime.timedelta(days = offset), event_description))
+
+	generated_events.sort()
+
+	return_events = events.EventList()
+
+	for event_date, event_description in generated_events:
+		return_events.append(event_date, event_description)
+
+	return return_events
+
+
+def cross_check_holidays(generated_events, scraped_events):
+	"""Compare the generated holidays against the scraped ones.
+
+	Only the years present in the scraped holidays are compared.
+	Returns a list of differences (strings), e.g.,
+	'missing (generated): 2023-04-10 | Ostermontag'; an empty
+	list means that both sources agree.
+	"""
+	scraped_set = set(scraped_events)
+	scraped_years = {event_date[0:4] for event_date, event_descr in scraped_set}
+
+	generated_set = {
+		(event_date, event_descr)
+		for event_date, event_descr in generated_events
+		if event_date[0:4] in scraped_years
+	}
+
+	return_differences = []
+
+	for event_date, event_descr in sorted(scraped_set - generated_set):
+		return_differences.append('missing (generated): ' + event_date + ' | ' + event_descr)
+
+	for event_date, event_descr in sorted(generated_set - scraped_set):
+		return_differences.append('missing (scraped): ' + event_date + ' | ' + event_descr)
+
+	return return_differences
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+Export or import a table (backups, migrations) with progress reporting.
+
+The transfer is performed by SqlHandler (export_table(), import_table(),
+import_table_bulk()) while the progress (rows, bytes, rows/s, latency
+percentiles of the batches, ETA) is written to the log
+('logs/YYYY-MM-DD_HH:MM:SS transfer_log.txt') and to a status file (JSON,
+see progress.py), which can be watched during long-running transfers.
+
+Usage: python3 src/transfer_table.py export|import|import-bulk PATH [--table TABLE]
+"""
+
+import argparse
+import sys
+
+import progress
+import pylogs
+
+
+def main(argv = None):
+	import sqlhandler
+
+	parser = argparse.ArgumentParser(description = 'Export or import a table with progress reporting.')
+	parser.add_argument('action', choices = ('export', 'import', 'import-bulk'),
+		help = 'export the table into PATH or import PATH (row by row or via the bulk loader)')
+	parser.add_argument('path', help = 'path of the exported/imported file')
+	parser.add_argument('--database', default = None, help = 'database (default: dbDatabase of the config)')
+	parser.add_argument('--table', default = None,
+		help = 'exported table (default: dbCalendarTable of the config) or target table of a CSV/TSV import')
+	parser.add_argument('--format', choices = ('sql', 'csv', 'tsv'), default = 'sql',
+		help = 'format of the export (default: %(default)s)')
+	parser.add_argument('--batch-size', type = int, default = 1000,
+		help = 'rows per fetched/inserted batch (default: %(default)s)')
+	parser.add_argument('--status', default = None,
+		help = 'path of the status file (default: next to the log in logs/)')
+	parser.add_argument('--interval', type = float, default = 5.0,
+		help = 'seconds between two progress reports (default: %(default)s)')
+	arguments = parser.parse_args(argv)
+
+	config = sqlhandler.load_config()
+	database = arguments.database or config.dbDatabase
+
+	transfer_log = pylogs.logs("logs/", "transfer_log")
+	status_path = arguments.status or transfer_log.log_prefix + " transfer_status.json"
+
+	job = arguments.action + ' ' + arguments.path
+	transfer_log.append_to_log("starting: " + job + " (status: " + status_path + ")")
+
+	reporter = progress.ProgressReporter(job, log = transfer_log, status_path = status_path,
+		report_interval = arguments.interval)
+
+	sqlhandlerObj = sqlhandler.SqlHandler(config)
+
+	if arguments.action == 'export':
+		sqlhandlerObj.export_table(arguments.path, False, database, arguments.table or config.dbCalendarTable,
+			arguments.format, arguments.batch_size, reporter)
+	elif arguments.action == 'import':
+		sqlhandlerObj.import_table(arguments.path, database, reporter)
+	else:
+		sqlhandlerObj.import_table_bulk(arguments.path, database, arguments.table,
+			arguments.batch_size, progress = reporter)
+
+	print(progress.format_status(reporter.status()))
+	transfer_log.append_to_log("finished: " + job)
+
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())